@@ -0,0 +1,75 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from po_localization.parser import Parser
+from po_localization.po_file import PoFile
+
+
+def write_synthetic_catalog(filename, entries_count, long_message_lines):
+    with io.open(filename, 'w', encoding='utf-8') as po_file:
+        po_file.write(
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Project-Id-Version: benchmark\\n"\n'
+            '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+            '"Plural-Forms: nplurals=2; plural=(n > 1)\\n"\n')
+        for index in range(entries_count):
+            po_file.write('\n#: module_{}.py:{}\n'.format(index % 100, index))
+            kind = index % 4
+            if kind == 0:
+                po_file.write('msgid "Message number {}"\n'.format(index))
+                po_file.write('msgstr "Message numéro {}"\n'.format(index))
+            elif kind == 1:
+                po_file.write('msgctxt "context {}"\n'.format(index % 10))
+                po_file.write('msgid "Message \\"quoted\\" {}"\n'.format(index))
+                po_file.write('msgstr "Message \\"cité\\" {}"\n'.format(index))
+            elif kind == 2:
+                po_file.write('msgid "{} item"\n'.format(index))
+                po_file.write('msgid_plural "{} items"\n'.format(index))
+                po_file.write('msgstr[0] "{} élément"\n'.format(index))
+                po_file.write('msgstr[1] "{} éléments"\n'.format(index))
+            else:
+                po_file.write('msgid ""\n"Multi-line\\n"\n"message {}"\n'.format(index))
+                po_file.write('msgstr ""\n')
+                for line in range(long_message_lines if index % 1000 == 3 else 3):
+                    po_file.write('"Ligne {} du message {}\\n"\n'.format(line, index))
+
+
+def parse(filename):
+    po_file = PoFile()
+    Parser(po_file).parse_po_filename(filename)
+    return po_file
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description='Benchmark po_localization.parser on a synthetic catalog')
+    argument_parser.add_argument('--entries', type=int, default=60000)
+    argument_parser.add_argument('--long-message-lines', type=int, default=2000)
+    argument_parser.add_argument('--repeat', type=int, default=5)
+    arguments = argument_parser.parse_args()
+    temp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(temp_dir, 'django.po')
+        write_synthetic_catalog(filename, arguments.entries, arguments.long_message_lines)
+        timings = timeit.repeat(lambda: parse(filename), number=1, repeat=arguments.repeat)
+        print('{} entries, {} bytes: best {:.3f}s, worst {:.3f}s'.format(
+            arguments.entries, os.path.getsize(filename), min(timings), max(timings)))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from .po_file import PoFile, TranslationEntry, get_msgid
+
+
+class BaseCatalog(object):
+    """
+    PoFile of the messages extracted from the source files of a tree, kept up to date between updates.
+    When some source files change, only the entries of their messages are built again,
+    the result is the same as adding the messages of all the files in order to a new PoFile.
+    """
+
+    def __init__(self):
+        self.po_file = PoFile()
+        self._filenames = []
+        # filename -> (signature, {msgid: [record, ...]})
+        self._files = {}
+        self._msgid_filenames = {}
+
+    def is_stale(self, filename, signature):
+        file_signature_and_records = self._files.get(filename)
+        return file_signature_and_records is None or file_signature_and_records[0] != signature
+
+    def update(self, files):
+        """
+        files is the list of (filename, signature, records) for all the source files, in extraction order.
+        records are the (message, plural, context, location filename, lineno) extracted from stale files,
+        None for the files which did not change.
+        """
+        filenames = [filename for filename, signature, records in files]
+        previous_filenames = set(self._filenames)
+        current_filenames = set(filenames)
+        if ([filename for filename in filenames if filename in previous_filenames] ==
+                [filename for filename in self._filenames if filename in current_filenames]):
+            touched_msgids = set()
+        else:
+            # The order of the files changed, the locations of any entry may have to be reordered
+            touched_msgids = set(self._msgid_filenames)
+        for filename in previous_filenames - current_filenames:
+            self._remove_file(filename, touched_msgids)
+        for filename, signature, records in files:
+            if records is not None:
+                self._remove_file(filename, touched_msgids)
+                self._add_file(filename, signature, records, touched_msgids)
+        self._filenames = filenames
+        file_indices = dict((filename, index) for index, filename in enumerate(filenames))
+        for msgid in touched_msgids:
+            self._build_entry(msgid, file_indices)
+
+    def _remove_file(self, filename, touched_msgids):
+        signature_and_records = self._files.pop(filename, None)
+        if signature_and_records is not None:
+            for msgid in signature_and_records[1]:
+                self._msgid_filenames[msgid].discard(filename)
+                touched_msgids.add(msgid)
+
+    def _add_file(self, filename, signature, records, touched_msgids):
+        records_by_msgid = {}
+        for record in records:
+            msgid = get_msgid(record[0], record[2])
+            if msgid in records_by_msgid:
+                records_by_msgid[msgid].append(record)
+            else:
+                records_by_msgid[msgid] = [record]
+                self._msgid_filenames.setdefault(msgid, set()).add(filename)
+                touched_msgids.add(msgid)
+        self._files[filename] = (signature, records_by_msgid)
+
+    def _build_entry(self, msgid, file_indices):
+        filenames = self._msgid_filenames.get(msgid)
+        if not filenames:
+            self._msgid_filenames.pop(msgid, None)
+            self.po_file.entries.pop(msgid, None)
+            return
+        entry = None
+        for filename in sorted(filenames, key=file_indices.get):
+            for message, plural, context, location_filename, lineno in self._files[filename][1][msgid]:
+                # Same merging rules as PoFile.add_entry
+                if entry is None:
+                    entry = TranslationEntry(message, plural, context)
+                elif entry.plural is None:
+                    entry.plural = plural
+                entry.add_location(location_filename, lineno)
+        self.po_file.entries[msgid] = entry
@@ -0,0 +1,73 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import marshal
+import os
+from . import parser
+
+CACHE_FORMAT_VERSION = 1
+CACHE_EXTENSION = '.cache'
+
+
+def load_catalog(filename, cache_dir=None):
+    """
+    Returns the catalog of a .po file, read from its compiled cache if the cache matches the file signature.
+    Otherwise the file is parsed and the cache is rewritten, write failures are ignored.
+    """
+    signature = get_signature(filename)
+    cache_filename = get_cache_filename(filename, cache_dir)
+    catalog = read_cache(cache_filename, signature)
+    if catalog is None:
+        catalog = {}
+        parser.fill_catalog_from_po_filename(filename, catalog)
+        write_cache(cache_filename, signature, catalog)
+    return catalog
+
+
+def get_signature(filename):
+    stat = os.stat(filename)
+    mtime_ns = getattr(stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(stat.st_mtime * 1000000000)
+    return os.path.abspath(filename), stat.st_size, mtime_ns, parser.PARSER_VERSION
+
+
+def get_cache_filename(filename, cache_dir=None):
+    if cache_dir is None:
+        return filename + CACHE_EXTENSION
+    path_hash = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, path_hash + CACHE_EXTENSION)
+
+
+def read_cache(cache_filename, signature):
+    try:
+        # marshal.load only accepts real files on Python 2, not io files
+        with io.open(cache_filename, 'rb') as cache_file:
+            format_version, cached_signature, catalog = marshal.loads(cache_file.read())
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+    if format_version != CACHE_FORMAT_VERSION or tuple(cached_signature) != signature or type(catalog) is not dict:
+        return None
+    return catalog
+
+
+def write_cache(cache_filename, signature, catalog):
+    # Write to a temporary file then rename it, so that concurrent readers never see a partial cache
+    temp_filename = '{}.{}.tmp'.format(cache_filename, os.getpid())
+    try:
+        cache_dir = os.path.dirname(cache_filename)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with io.open(temp_filename, 'wb') as cache_file:
+            cache_file.write(marshal.dumps((CACHE_FORMAT_VERSION, signature, catalog)))
+        getattr(os, 'replace', os.rename)(temp_filename, cache_filename)
+    except (IOError, OSError):
+        try:
+            os.unlink(temp_filename)
+        except OSError:
+            pass
@@ -0,0 +1,88 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from .catalog_cache import get_signature
+
+
+class CatalogMerger(object):
+    """
+    Merges the catalogs of several translation files into one catalog, later files overriding earlier ones.
+    Remembers the parsed contents of each file and which file supplied each key,
+    so that when some files change only those are parsed again and only their keys are patched.
+    Merged catalogs are never modified once returned, a new catalog is returned instead.
+    """
+
+    def __init__(self):
+        self.catalog = None
+        self.file_paths = []
+        self.files = {}
+        self.providers = {}
+
+    def get_stale_files(self, file_paths):
+        """
+        Returns the files which need to be parsed for the next merge.
+        """
+        stale_file_paths = []
+        for file_path in file_paths:
+            signature, file_catalog = self.files.get(file_path, (None, None))
+            if signature != get_signature(file_path):
+                stale_file_paths.append(file_path)
+        return stale_file_paths
+
+    def merge(self, catalog, file_paths, load_file_catalog):
+        """
+        Returns a catalog with the contents of the files, load_file_catalog(file_path) is called for stale files.
+        The given catalog is left untouched, so that it can still be read while the new one is built.
+        If catalog is the one returned by the previous merge and the list of files is unchanged,
+        the new catalog is a copy of it in which only the keys of the changed files are updated,
+        otherwise the new catalog is built from scratch.
+        """
+        file_paths = list(file_paths)
+        changed_indices = []
+        files = {}
+        for index, file_path in enumerate(file_paths):
+            signature = get_signature(file_path)
+            previous_signature, file_catalog = self.files.get(file_path, (None, None))
+            if signature != previous_signature:
+                file_catalog = load_file_catalog(file_path)
+                changed_indices.append(index)
+            files[file_path] = (signature, file_catalog)
+        if catalog is self.catalog and file_paths == self.file_paths:
+            if changed_indices:
+                catalog = catalog.copy()
+                for index in changed_indices:
+                    self._patch(catalog, index, self.files[file_paths[index]][1], files[file_paths[index]][1], files)
+        else:
+            catalog = {}
+            providers = {}
+            for index, file_path in enumerate(file_paths):
+                file_catalog = files[file_path][1]
+                catalog.update(file_catalog)
+                providers.update(dict.fromkeys(file_catalog, index))
+            self.file_paths = file_paths
+            self.providers = providers
+        self.catalog = catalog
+        self.files = files
+        return catalog
+
+    def _patch(self, catalog, index, previous_file_catalog, file_catalog, files):
+        providers = self.providers
+        for key in previous_file_catalog:
+            if key not in file_catalog and providers.get(key) == index:
+                # The key was removed from its provider, fall back on the previous files
+                for previous_index in range(index - 1, -1, -1):
+                    previous_catalog = files[self.file_paths[previous_index]][1]
+                    if key in previous_catalog:
+                        catalog[key] = previous_catalog[key]
+                        providers[key] = previous_index
+                        break
+                else:
+                    del catalog[key]
+                    del providers[key]
+        for key, translation in file_catalog.items():
+            if providers.get(key, index) <= index:
+                catalog[key] = translation
+                providers[key] = index
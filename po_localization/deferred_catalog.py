@@ -0,0 +1,56 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+class DeferredCatalog(MutableMapping):
+    """
+    Placeholder catalog of a translation object, which calls load() the first time it is used.
+    load() is expected to replace the catalog of the translation object, to which all operations are then delegated.
+    Concurrent first uses all call load(), which must make them wait for a single loading.
+    """
+
+    def __init__(self, translation, load):
+        self._translation = translation
+        self._load = load
+
+    def _get_catalog(self):
+        catalog = self._translation._catalog
+        if catalog is self:
+            self._load()
+            catalog = self._translation._catalog
+            if catalog is self:
+                # Nothing was loaded, behave as an empty catalog
+                return {}
+        return catalog
+
+    def __getitem__(self, key):
+        return self._get_catalog()[key]
+
+    def get(self, key, default=None):
+        return self._get_catalog().get(key, default)
+
+    def __setitem__(self, key, value):
+        self._get_catalog()[key] = value
+
+    def __delitem__(self, key):
+        del self._get_catalog()[key]
+
+    def __contains__(self, key):
+        return key in self._get_catalog()
+
+    def __iter__(self):
+        return iter(self._get_catalog())
+
+    def __len__(self):
+        return len(self._get_catalog())
+
+    def clear(self):
+        self._get_catalog().clear()
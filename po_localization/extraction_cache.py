@@ -0,0 +1,146 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import marshal
+import os
+
+CACHE_FORMAT_VERSION = 1
+
+
+class ExtractionCache(object):
+    """
+    Messages extracted from each source file of a tree, stored in a single cache file.
+    A source file is only extracted again when its size, modification time or printable name changes,
+    or when the version of the extractors changes.
+    """
+
+    def __init__(self, filename, version):
+        self.filename = filename
+        self.version = version
+        self._files = None
+        self._extracted_filenames = set()
+        self._is_modified = False
+
+    def get_records(self, extractor, filename, printable_filename=None, records=None):
+        """
+        Returns the messages of the file like extract_records, from the cache if the file did not change.
+        records, if given, are the messages of the file already extracted by extract_records.
+        """
+        if self._files is None:
+            self._files = self._load()
+        signature = get_signature(filename, printable_filename)
+        signature_and_records = self._files.get(filename)
+        if signature_and_records is None or tuple(signature_and_records[0]) != signature:
+            if records is None:
+                records = extract_records(extractor, filename, printable_filename)
+            signature_and_records = self._files[filename] = (signature, records)
+            self._is_modified = True
+        self._extracted_filenames.add(filename)
+        return signature_and_records[1]
+
+    def keep(self, filename):
+        """
+        Keeps the cached messages of the file on the next save, even though they were not used.
+        """
+        self._extracted_filenames.add(filename)
+
+    def is_cached(self, filename, printable_filename=None):
+        if self._files is None:
+            self._files = self._load()
+        signature_and_records = self._files.get(filename)
+        return (signature_and_records is not None and
+                tuple(signature_and_records[0]) == get_signature(filename, printable_filename))
+
+    def save(self):
+        """
+        Forgets the files which were not extracted since the last save, then writes the cache file if it changed.
+        Write failures are ignored.
+        """
+        if self._files is None:
+            return
+        for filename in list(self._files):
+            if filename not in self._extracted_filenames:
+                del self._files[filename]
+                self._is_modified = True
+        self._extracted_filenames = set()
+        if self._is_modified:
+            write_cache(self.filename, (CACHE_FORMAT_VERSION, self.version, self._files))
+            self._is_modified = False
+
+    def _load(self):
+        try:
+            # marshal.load only accepts real files on Python 2, not io files
+            with io.open(self.filename, 'rb') as cache_file:
+                format_version, version, files = marshal.loads(cache_file.read())
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return {}
+        if format_version != CACHE_FORMAT_VERSION or version != self.version or type(files) is not dict:
+            return {}
+        return files
+
+
+class MessagesRecorder(object):
+    """
+    Stands for a PoFile in extractors, recording the messages and their locations in extraction order.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def add_entry(self, message, plural=None, context=None):
+        return RecordedEntry(self.records, message, plural, context)
+
+
+class RecordedEntry(object):
+    def __init__(self, records, message, plural, context):
+        self.records = records
+        self.message = message
+        self.plural = plural
+        self.context = context
+
+    def add_location(self, filename, lineno):
+        self.records.append((self.message, self.plural, self.context, filename, lineno))
+
+
+def extract_records(extractor, filename, printable_filename=None):
+    """
+    Returns the messages and locations extracted from the file, in extraction order.
+    """
+    recorder = MessagesRecorder()
+    extractor(filename, recorder, printable_filename=printable_filename)
+    return recorder.records
+
+
+def get_signature(filename, printable_filename):
+    stat = os.stat(filename)
+    mtime_ns = getattr(stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(stat.st_mtime * 1000000000)
+    return stat.st_size, mtime_ns, printable_filename
+
+
+def get_cache_filename(root_path, cache_dir):
+    path_hash = hashlib.sha1(os.path.abspath(root_path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, 'extraction-{}.cache'.format(path_hash))
+
+
+def write_cache(cache_filename, data):
+    # Write to a temporary file then rename it, so that concurrent readers never see a partial cache
+    temp_filename = '{}.{}.tmp'.format(cache_filename, os.getpid())
+    try:
+        cache_dir = os.path.dirname(cache_filename)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with io.open(temp_filename, 'wb') as cache_file:
+            cache_file.write(marshal.dumps(data))
+        getattr(os, 'replace', os.rename)(temp_filename, cache_filename)
+    except (IOError, OSError):
+        try:
+            os.unlink(temp_filename)
+        except OSError:
+            pass
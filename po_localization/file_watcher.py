@@ -4,37 +4,159 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import errno
 import os
+import stat
 import sys
 import threading
+from collections import namedtuple
+from .inotify import get_shared_inotify
+from .scan_cache import walk_excluding
+
+ChangeSet = namedtuple('ChangeSet', ['added', 'modified', 'removed'])
 
 
 class FileWatcher(object):
-    def __init__(self, operator):
+    """
+    Executes its operator when the files returned by operator.list_files() change.
+    Operators with a true accepts_change_set attribute are executed with the ChangeSet of the files
+    added, modified and removed since their last execution, or None if everything must be processed again.
+    """
+
+    def __init__(self, operator, blocking=True, use_inotify=False):
         self.operator = operator
+        self.blocking = blocking
+        self.use_inotify = use_inotify
+        self.inotify = None
+        self.inotify_failed = False
         self.file_mtimes = {}
+        # Modification times of the files at the last execution of the operator, None if unknown
+        self.executed_file_mtimes = None
         self.is_dirty = True
+        # Number of times the operator has been executed, only written while holding the lock
+        self.generation = 0
         self.lock = threading.Lock()
 
     def set_dirty(self):
+        self.executed_file_mtimes = None
         self.is_dirty = True
 
     def check(self):
-        with self.lock:
+        """
+        Executes the operator if any of its files changed since the last execution.
+        When not blocking and the operator has already been executed once,
+        returns immediately if another thread is already checking, the previous execution results are then used.
+        """
+        if self.blocking or self.generation == 0:
+            self.lock.acquire()
+        elif not self.lock.acquire(False):
+            return
+        try:
             self._check_for_changes()
             if self.is_dirty:
-                self.operator.execute()
+                if getattr(self.operator, 'accepts_change_set', False):
+                    self.operator.execute(self.get_change_set())
+                else:
+                    self.operator.execute()
+                self.executed_file_mtimes = dict(self.file_mtimes)
                 self.is_dirty = False
+                self.generation += 1
+        finally:
+            self.lock.release()
+
+    def get_change_set(self):
+        """
+        Returns the ChangeSet of the files since the last execution, or None if it is unknown.
+        """
+        previous_mtimes = self.executed_file_mtimes
+        if previous_mtimes is None:
+            return None
+        file_mtimes = self.file_mtimes
+        return ChangeSet(
+            added=frozenset(path for path in file_mtimes if path not in previous_mtimes),
+            modified=frozenset(
+                path for path, mtime in file_mtimes.items()
+                if path in previous_mtimes and previous_mtimes[path] != mtime),
+            removed=frozenset(path for path in previous_mtimes if path not in file_mtimes))
+
+    def close(self):
+        with self.lock:
+            self._stop_watching()
 
     def _check_for_changes(self):
+        if self._has_watched_changes():
+            self._scan_files()
+
+    def _has_watched_changes(self):
+        """
+        Returns False if inotify is watching the directories of the operator and reported no event since the last scan.
+        Operators can be watched with inotify if they implement list_directories(),
+        returning the existing directories containing their files, these directories are watched recursively.
+        """
+        if not self.use_inotify or not hasattr(self.operator, 'list_directories'):
+            self._stop_watching()
+            return True
+        if self.inotify is not None and self.inotify.is_closed():
+            # The process was forked, the watches of the parent process are not inherited
+            self.inotify = None
+        if self.inotify is None:
+            if not self.inotify_failed:
+                # Directories are watched before the first scan, so that no change is missed in between
+                try:
+                    self.inotify = get_shared_inotify().subscribe()
+                    self._watch_directories()
+                except OSError:
+                    # Fall back on scanning the files on each check
+                    self._stop_watching()
+                    self.inotify_failed = True
+            return True
+        try:
+            if not self.inotify.read_events():
+                return False
+            # Watch the directories which were created since the last scan
+            self._watch_directories()
+        except OSError:
+            self._stop_watching()
+            self.inotify_failed = True
+        return True
+
+    def _watch_directories(self):
+        # Like for listing files, excluded directories are not walked and the listings of the operator are reused
+        excluded_patterns = getattr(self.operator, 'excluded_patterns', ())
+        scan_cache = getattr(self.operator, 'scan_cache', None)
+        walk = os.walk if scan_cache is None else scan_cache.walk
+        for directory in self.operator.list_directories():
+            # Missing directories are skipped, watching their parents could report unrelated changes,
+            # operators should list the nearest existing directory they own instead
+            for dirpath, dirnames, filenames in walk_excluding(walk, directory, excluded_patterns):
+                self._add_watch(dirpath)
+
+    def _add_watch(self, directory):
+        try:
+            self.inotify.add_watch(directory)
+        except OSError as e:
+            # The directory was removed since it was listed, the event is reported by its parent
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _stop_watching(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def _scan_files(self):
         files_list = set(self.operator.list_files())
         for file_path in list(self.file_mtimes.keys()):
             if file_path not in files_list:
                 self.is_dirty = True
                 del self.file_mtimes[file_path]
         for file_path in files_list:
-            if os.path.isfile(file_path):
-                file_mtime = get_file_mtime(file_path)
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                file_stat = None
+            if file_stat is not None and stat.S_ISREG(file_stat.st_mode):
+                file_mtime = get_stat_mtime(file_stat)
                 if file_path not in self.file_mtimes or self.file_mtimes[file_path] != file_mtime:
                     self.file_mtimes[file_path] = file_mtime
                     self.is_dirty = True
@@ -44,8 +166,11 @@ class FileWatcher(object):
 
 
 def get_file_mtime(filename):
-    stat = os.stat(filename)
-    mtime = stat.st_mtime
+    return get_stat_mtime(os.stat(filename))
+
+
+def get_stat_mtime(file_stat):
+    mtime = file_stat.st_mtime
     if sys.platform == 'win32':
-        mtime -= stat.st_ctime
+        mtime -= file_stat.st_ctime
     return mtime
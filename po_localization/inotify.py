@@ -0,0 +1,229 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import threading
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+    IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+READ_SIZE = 64 * 1024
+# wd, mask, cookie, name length
+EVENT = struct.Struct(str('iIII'))
+
+_libc = None
+_shared_inotify = None
+_shared_inotify_lock = threading.Lock()
+
+
+def get_libc():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not supported by the C library")
+        _libc = libc
+    return _libc
+
+
+class Inotify(object):
+    """
+    Non-blocking inotify instance, only telling whether anything changed in the watched directories.
+    Raises OSError when inotify is unavailable or when a watch cannot be added, for example when the limit is hit.
+    """
+
+    def __init__(self):
+        self._libc = get_libc()
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise_errno()
+
+    def add_watch(self, path):
+        """
+        Returns the watch descriptor of the path, which is the same for all the watches of a directory.
+        """
+        if not isinstance(path, bytes):
+            path = path.encode(sys.getfilesystemencoding())
+        wd = self._libc.inotify_add_watch(self.fd, path, WATCH_MASK)
+        if wd < 0:
+            raise_errno(path)
+        return wd
+
+    def remove_watch(self, wd):
+        # Fails if the watch was already removed because its directory was, which is fine
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """
+        Consumes the pending events and returns whether there were any, including queue overflows.
+        """
+        return bool(self.read_event_masks())
+
+    def read_event_masks(self):
+        """
+        Consumes the pending events and returns their (wd, mask), queue overflows have a wd of -1.
+        """
+        event_masks = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return event_masks
+                raise
+            if not data:
+                return event_masks
+            offset = 0
+            while offset + EVENT.size <= len(data):
+                wd, mask, cookie, name_length = EVENT.unpack_from(data, offset)
+                event_masks.append((wd, mask))
+                offset += EVENT.size + name_length
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class SharedInotify(object):
+    """
+    Inotify instance shared by all the watchers of a process, since the number of instances per user is limited.
+    Each watcher subscribes to it, and only reads the events of the directories it watches.
+    """
+
+    def __init__(self):
+        self.inotify = Inotify()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        # wd -> subscriptions watching it
+        self.subscriptions = {}
+
+    def subscribe(self):
+        return InotifySubscription(self)
+
+    def is_closed(self):
+        # A forked process does not receive the events of the watches of its parent
+        return self.inotify.fd < 0 or self.pid != os.getpid()
+
+    def add_watch(self, subscription, path):
+        with self.lock:
+            wd = self.inotify.add_watch(path)
+            self.subscriptions.setdefault(wd, set()).add(subscription)
+            return wd
+
+    def remove_watches(self, subscription, wds):
+        with self.lock:
+            for wd in wds:
+                subscriptions = self.subscriptions.get(wd)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self.subscriptions[wd]
+                        if not self.is_closed():
+                            self.inotify.remove_watch(wd)
+
+    def dispatch_events(self):
+        """
+        Reads the pending events and marks the subscriptions which received some.
+        """
+        with self.lock:
+            for wd, mask in self.inotify.read_event_masks():
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost, any subscription may have missed some
+                    for subscriptions in self.subscriptions.values():
+                        for subscription in subscriptions:
+                            subscription.has_events = True
+                    continue
+                for subscription in self.subscriptions.get(wd, ()):
+                    subscription.has_events = True
+                    if mask & IN_IGNORED:
+                        # The directory was removed, so was its watch
+                        subscription.forget_watch(wd)
+                if mask & IN_IGNORED:
+                    self.subscriptions.pop(wd, None)
+
+
+class InotifySubscription(object):
+    """
+    Watches of one watcher on the SharedInotify of the process, with the same interface as Inotify.
+    """
+
+    def __init__(self, shared_inotify):
+        self.shared_inotify = shared_inotify
+        self.has_events = False
+        # path -> wd, so that directories are only watched once
+        self.watched_paths = {}
+
+    def is_closed(self):
+        return self.shared_inotify is None or self.shared_inotify.is_closed()
+
+    def add_watch(self, path):
+        if path not in self.watched_paths:
+            self.watched_paths[path] = self.shared_inotify.add_watch(self, path)
+
+    def forget_watch(self, wd):
+        for path, path_wd in list(self.watched_paths.items()):
+            if path_wd == wd:
+                del self.watched_paths[path]
+
+    def read_events(self):
+        """
+        Returns whether any event was received for the watched directories since the last call.
+        """
+        self.shared_inotify.dispatch_events()
+        has_events = self.has_events
+        self.has_events = False
+        return has_events
+
+    def close(self):
+        if self.shared_inotify is not None:
+            self.shared_inotify.remove_watches(self, set(self.watched_paths.values()))
+            self.watched_paths = {}
+            self.shared_inotify = None
+
+
+def get_shared_inotify():
+    """
+    Returns the SharedInotify of the process, creating it on first use or after a fork.
+    Raises OSError when inotify is unavailable.
+    """
+    global _shared_inotify
+    with _shared_inotify_lock:
+        if _shared_inotify is None or _shared_inotify.is_closed():
+            if _shared_inotify is not None:
+                # The descriptor inherited from the parent process is only closed in this process
+                _shared_inotify.inotify.close()
+            _shared_inotify = SharedInotify()
+        return _shared_inotify
+
+
+def raise_errno(path=None):
+    error_number = ctypes.get_errno()
+    if path is None:
+        raise OSError(error_number, os.strerror(error_number))
+    raise OSError(error_number, os.strerror(error_number), path)
@@ -0,0 +1,286 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import mmap
+import os
+import re
+import threading
+from .parser import (
+    BYTES_LINE_MATCHER, BYTES_KEYWORDS, MSGCTXT, MSGID, MSGID_PLURAL, START, AFTER_MSGCTXT, AFTER_MSGID,
+    AFTER_MSGID_PLURAL, AFTER_MSGSTR, AFTER_PLURAL_MSGSTR, STATE_NAMES, ParseError)
+from .po_file import get_msgid
+from .strings import unescape, UnescapeError
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+# Matches a quoted string content in which every escape sequence is valid for strings.unescape
+VALID_ESCAPES_MATCHER = re.compile(br'(?:[^\\]|\\[abfnrtv\\"0-7]|\\x[0-9a-fA-F])*')
+NON_ASCII_MATCHER = re.compile(b'[\x80-\xff]')
+
+
+class LazyCatalog(MutableMapping):
+    """
+    Catalog mapping which only indexes the translations of memory-mapped .po files.
+    Each translation is unescaped and decoded the first time it is looked up, then cached.
+    """
+
+    def __init__(self):
+        self._translations = {}
+        self._locations = {}
+        self._po_files = []
+        self._drop_lock = threading.Lock()
+
+    def add_po_filename(self, filename):
+        """
+        Indexes the non-empty translations of the file, overriding the translations already in the catalog.
+        """
+        po_file = MappedPoFile(filename)
+        translations = self._translations
+        locations = self._locations
+        for key, start, end in po_file.iter_index():
+            translations.pop(key, None)
+            locations[key] = (po_file, start, end)
+        self._po_files.append(po_file)
+
+    def __getitem__(self, key):
+        try:
+            return self._translations[key]
+        except KeyError:
+            location = self._locations.get(key)
+        if location is None:
+            # Another thread may have decoded the translation since it was looked up
+            return self._translations[key]
+        po_file, start, end = location
+        translation = po_file.decode(start, end)
+        if translation is None:
+            # The file changed since it was indexed, its translations are dropped until the reload
+            self._drop_po_file(po_file)
+            raise KeyError(key)
+        # The translation is stored before its location is removed, so that concurrent lookups always find one
+        self._translations[key] = translation
+        self._locations.pop(key, None)
+        return translation
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        self._locations.pop(key, None)
+        self._translations[key] = value
+
+    def __delitem__(self, key):
+        if self._locations.pop(key, None) is None:
+            del self._translations[key]
+        else:
+            self._translations.pop(key, None)
+
+    def __contains__(self, key):
+        if key in self._translations:
+            return True
+        location = self._locations.get(key)
+        if location is None:
+            return False
+        if location[0].is_changed():
+            self._drop_po_file(location[0])
+            return False
+        return True
+
+    def __iter__(self):
+        self._drop_changed_po_files()
+        for key in list(self._translations):
+            yield key
+        for key in list(self._locations):
+            # A key being decoded by another thread may briefly be in both dicts
+            if key not in self._translations:
+                yield key
+
+    def __len__(self):
+        self._drop_changed_po_files()
+        return len(self._translations) + len(self._locations)
+
+    def clear(self):
+        # Mapped files are closed when the last reference to them is dropped
+        self._translations.clear()
+        self._locations.clear()
+        del self._po_files[:]
+
+    def _drop_changed_po_files(self):
+        for po_file in list(self._po_files):
+            if po_file.is_changed():
+                self._drop_po_file(po_file)
+
+    def _drop_po_file(self, po_file):
+        """
+        Removes the translations of the file which were not decoded yet,
+        so that lookups, membership tests, iteration and length agree.
+        """
+        with self._drop_lock:
+            if po_file not in self._po_files:
+                return
+            locations = self._locations
+            # Other threads may decode translations meanwhile, the locations are copied first
+            for key, location in list(locations.items()):
+                if location[0] is po_file:
+                    locations.pop(key, None)
+            self._po_files.remove(po_file)
+
+
+class MappedPoFile(object):
+    def __init__(self, filename):
+        self.filename = filename
+        # XXX: Actually, encoding may be different and specified in the .po file comment
+        with io.open(filename, 'rb') as po_file:
+            stat = os.fstat(po_file.fileno())
+            self.size = stat.st_size
+            self.mtime = stat.st_mtime
+            self.inode = stat.st_ino
+            # Empty files cannot be mapped. The map keeps its own descriptor, the file does not need to stay open
+            self.buffer = mmap.mmap(po_file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+    def iter_index(self):
+        """
+        Yields (key, start, end) for each non-empty translation, with the same keys as PoFile.get_catalog.
+        start and end delimit the lines of the translation strings in the mapped buffer.
+        Message ids are decoded, translations are only validated.
+        """
+        buffer = self.buffer
+        buffer_length = len(buffer)
+        filename = self.filename
+        match_line = BYTES_LINE_MATCHER.match
+        keywords = BYTES_KEYWORDS
+        state = START
+        context = message = current = None
+        translations = []
+        position = 0
+        line_number = 0
+        while position < buffer_length:
+            line_start = position
+            match = match_line(buffer, position)
+            if match is None:
+                line_end = buffer.find(b'\n', position)
+                line = buffer[position:] if line_end == -1 else buffer[position:line_end + 1]
+                raise ParseError(filename, line_number, "Invalid syntax: {}".format(line.decode('utf-8', 'replace')))
+            position = match.end()
+            string_start, string_end = match.span(5)
+            if string_start != -1:
+                keyword = match.group(2)
+                if match.group(3) is not None:
+                    plural_index = match.group(4)
+                    if state == AFTER_MSGID:
+                        if plural_index is not None:
+                            raise ParseError(filename, line_number, "Unexpected plural message index after keyword")
+                        state = AFTER_MSGSTR
+                    elif state == AFTER_MSGID_PLURAL or state == AFTER_PLURAL_MSGSTR:
+                        if plural_index is None:
+                            raise ParseError(filename, line_number, "Missing plural message index after keyword")
+                        plural_index = int(plural_index)
+                        if any(translation[0] == plural_index for translation in translations):
+                            raise ParseError(filename, line_number,
+                                "Duplicate plural message index: {}".format(plural_index))
+                        state = AFTER_PLURAL_MSGSTR
+                    else:
+                        raise ParseError(filename, line_number, "Unexpected keyword: msgstr")
+                    self._check_string(string_start, string_end, line_number)
+                    current = [plural_index, line_start, position, string_end > string_start]
+                    translations.append(current)
+                elif keyword is None:
+                    if current is None:
+                        raise ParseError(filename, line_number,
+                            "Unexpected string continuation after '{}'".format(STATE_NAMES[state]))
+                    if state == AFTER_MSGSTR or state == AFTER_PLURAL_MSGSTR:
+                        self._check_string(string_start, string_end, line_number)
+                        current[2] = position
+                        current[3] = current[3] or string_end > string_start
+                    else:
+                        current.append(self._decode_string(string_start, string_end, line_number))
+                else:
+                    token = keywords[keyword]
+                    if token == MSGID and state != AFTER_MSGID and state != AFTER_MSGID_PLURAL:
+                        if state != AFTER_MSGCTXT:
+                            for item in self._iter_entry_index(context, message, translations):
+                                yield item
+                            context = None
+                            translations = []
+                        message = current = [self._decode_string(string_start, string_end, line_number)]
+                        state = AFTER_MSGID
+                    elif token == MSGCTXT and (state == START or state >= AFTER_MSGSTR):
+                        for item in self._iter_entry_index(context, message, translations):
+                            yield item
+                        message = None
+                        translations = []
+                        context = current = [self._decode_string(string_start, string_end, line_number)]
+                        state = AFTER_MSGCTXT
+                    elif token == MSGID_PLURAL and state == AFTER_MSGID:
+                        # Plural messages are not part of the keys, they only need to be valid
+                        current = [self._decode_string(string_start, string_end, line_number)]
+                        state = AFTER_MSGID_PLURAL
+                    else:
+                        raise ParseError(
+                            filename, line_number, "Unexpected keyword: {}".format(keyword.decode('ascii')))
+            line_number += 1
+        for item in self._iter_entry_index(context, message, translations):
+            yield item
+        if state in (AFTER_MSGCTXT, AFTER_MSGID, AFTER_MSGID_PLURAL):
+            raise ParseError(filename, None, "Unexpected end of file")
+
+    def _iter_entry_index(self, context, message, translations):
+        if message is not None:
+            message = ''.join(message)
+            if message != '':
+                msgid = get_msgid(message, None if context is None else ''.join(context))
+                for plural_index, start, end, is_not_empty in translations:
+                    if is_not_empty:
+                        yield msgid if plural_index is None else (msgid, plural_index), start, end
+
+    def _check_string(self, start, end, line_number):
+        # Translations are not decoded while indexing, only their encoding and escape sequences are checked
+        if NON_ASCII_MATCHER.search(self.buffer, start, end) is not None:
+            self.buffer[start:end].decode('utf-8')
+        if self.buffer.find(b'\\', start, end) != -1:
+            if VALID_ESCAPES_MATCHER.match(self.buffer, start, end).end() != end:
+                self._decode_string(start, end, line_number)
+
+    def _decode_string(self, start, end, line_number):
+        string = self.buffer[start:end].decode('utf-8')
+        try:
+            return unescape(string) if '\\' in string else string
+        except UnescapeError as e:
+            raise ParseError(self.filename, line_number, e)
+
+    def is_changed(self):
+        """
+        Returns whether the file was modified, replaced or removed since it was mapped.
+        """
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return True
+        return stat.st_size != self.size or stat.st_mtime != self.mtime or stat.st_ino != self.inode
+
+    def decode(self, start, end):
+        """
+        Returns the translation stored between start and end, or None if the file changed since it was indexed.
+        """
+        if self.is_changed():
+            return None
+        buffer = self.buffer
+        match_line = BYTES_LINE_MATCHER.match
+        fragments = []
+        while start < end:
+            match = match_line(buffer, start, end)
+            start = match.end()
+            fragment = match.group(5)
+            if fragment is not None:
+                fragment = fragment.decode('utf-8')
+                fragments.append(unescape(fragment) if '\\' in fragment else fragment)
+        return ''.join(fragments)
@@ -4,13 +4,24 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from optparse import make_option
 from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
     help = 'Update translation files'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--jobs', '-j', type='int', dest='jobs', default=None,
+            help='Number of processes used to extract messages and update translation files, '
+                 'defaults to UPDATE_TRANSLATIONS_JOBS'),
+    )
 
     def handle(self, *args, **options):
         from ...middleware import PoLocalizationMiddleware
         po_localization_middleware = PoLocalizationMiddleware()
-        po_localization_middleware.translations_updater.execute()
+        if options.get('jobs') is not None:
+            po_localization_middleware.translations_updater.jobs = options['jobs']
+        written_files_count = po_localization_middleware.translations_updater.execute()
+        if int(options.get('verbosity', 1)) >= 1:
+            self.stdout.write("{} translation file(s) written".format(written_files_count))
@@ -14,6 +14,7 @@ import django.utils.translation.trans_real
 from po_localization.file_watcher import FileWatcher
 from po_localization.translations_loader import TranslationsLoader
 from po_localization.translations_updater import TranslationsUpdater
+from po_localization.watcher_thread import WatcherThread
 
 
 class PoLocalizationMiddleware(object):
@@ -21,10 +22,11 @@ class PoLocalizationMiddleware(object):
         self.translations_updater = TranslationsUpdater()
         self.translations_loader = TranslationsLoader()
         self.translations_updater_watcher = FileWatcher(self.translations_updater)
-        self.translations_loader_watcher = FileWatcher(self.translations_loader)
+        self.translations_loader_watchers = []
+        self.watcher_thread = WatcherThread(self.check_watchers)
+        self.waiting_for_first_request = True
         self.reconfigure()
         setting_changed.connect(self._reconfigure)
-        self.waiting_for_first_request = True
 
     def _reconfigure(self, sender, **kwargs):
         self.reconfigure()
@@ -35,18 +37,58 @@ class PoLocalizationMiddleware(object):
             excluded_locales=getattr(settings, 'UPDATE_TRANSLATIONS_EXCLUDED_LOCALES', ()))
         self.translations_updater.include_locations = getattr(settings, 'UPDATE_TRANSLATIONS_WITH_LOCATIONS', True)
         self.translations_updater.prune_obsoletes = getattr(settings, 'UPDATE_TRANSLATIONS_PRUNE_OBSOLETES', False)
+        self.translations_updater.excluded_patterns = getattr(settings, 'UPDATE_TRANSLATIONS_EXCLUDED_PATHS', ())
+        self.translations_updater.use_cache = getattr(settings, 'UPDATE_TRANSLATIONS_CACHE', False)
+        self.translations_updater.jobs = getattr(settings, 'UPDATE_TRANSLATIONS_JOBS', 1)
+        self.translations_updater.cache_dir = getattr(settings, 'TRANSLATIONS_CACHE_DIR', None)
+        use_inotify = getattr(settings, 'TRANSLATIONS_INOTIFY', False)
+        self.translations_updater_watcher.use_inotify = use_inotify
+        # Watch the new root paths
+        self.translations_updater_watcher.close()
         # Force update in case any setting has changed (which changes the output)
         self.translations_updater_watcher.set_dirty()
 
         self.translations_loader.locales = get_enabled_locales()
         self.translations_loader.locale_paths = get_translations_reload_roots()
+        self.translations_loader.catalog_type = getattr(settings, 'TRANSLATIONS_CATALOG_TYPE', 'dict')
+        self.translations_loader.use_cache = getattr(settings, 'TRANSLATIONS_CACHE', False)
+        self.translations_loader.cache_dir = getattr(settings, 'TRANSLATIONS_CACHE_DIR', None)
+        self.translations_loader.jobs = getattr(settings, 'LOAD_TRANSLATIONS_JOBS', 1)
+        self.translations_loader.on_demand = getattr(settings, 'LOAD_TRANSLATIONS_ON_DEMAND', False)
+        self.eager_locale = django.utils.translation.trans_real.to_locale(settings.LANGUAGE_CODE)
+        # Each locale is watched separately, so that a modified file only reloads the catalog of its locale.
+        # New watchers are dirty, which forces a reload in case the catalog type has changed.
+        # When not blocking, requests keep using the current catalogs while another request reloads them.
+        blocking = getattr(settings, 'AUTO_RELOAD_TRANSLATIONS_BLOCKING', True)
+        for translations_loader_watcher in self.translations_loader_watchers:
+            translations_loader_watcher.close()
+        self.translations_loader_watchers = [
+            FileWatcher(operator, blocking=blocking, use_inotify=use_inotify)
+            for operator in self.translations_loader.get_locale_operators()]
+
+        self.watcher_thread.stop()
+        if getattr(settings, 'TRANSLATIONS_WATCHER_THREAD', False):
+            self.watcher_thread.interval = getattr(settings, 'TRANSLATIONS_WATCHER_INTERVAL', 1.0)
+            self.watcher_thread.start()
 
     def process_request(self, request):
+        # With a watcher thread, requests only wait for the first loading of the translations
+        if self.waiting_for_first_request or not self.watcher_thread.is_alive():
+            self.check_watchers()
+        self.waiting_for_first_request = False
+
+    def check_watchers(self):
         if getattr(settings, 'AUTO_UPDATE_TRANSLATIONS', False):
             self.translations_updater_watcher.check()
         if self.waiting_for_first_request or getattr(settings, 'AUTO_RELOAD_TRANSLATIONS', settings.DEBUG):
-            self.translations_loader_watcher.check()
-        self.waiting_for_first_request = False
+            for translations_loader_watcher in self.translations_loader_watchers:
+                operator = translations_loader_watcher.operator
+                if (not self.translations_loader.on_demand or operator.locale == self.eager_locale
+                        or operator.is_loaded()):
+                    translations_loader_watcher.check()
+                else:
+                    # Loaded by the first translation lookup, concurrent lookups wait for the watcher lock
+                    self.translations_loader.defer(operator.locale, translations_loader_watcher.check)
 
 
 def get_enabled_locales(excluded_locales=()):
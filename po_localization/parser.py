@@ -4,31 +4,49 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import collections
 import io
 import re
-from po_localization.po_file import PoFile
+from po_localization.po_file import PoFile, get_msgid
 from .strings import unescape, UnescapeError
 
-MATCHER = re.compile(r"""
-    ^\s*
-    ( # optional:
-        \#.*
-    )? # comment (group 1)
+# Matches exactly one line of a buffer, including its terminating newline.
+LINE_MATCHER = re.compile(r"""
+    [^\S\n]*
     (?: # optional:
+        (\#[^\n]*) # comment (group 1)
+    |
         (?: # optional:
-            ( # keywords (group 2)
-                (?:msgctxt|msgid|msgid_plural)(?!\[) # without index
-                | msgstr # with index
-            )
+            (msgctxt|msgid|msgid_plural)(?!\[) # keyword without index (group 2)
+            | (msgstr) # keyword with index (group 3)
             (?: # optional:
-                \[(\d+)\] # message string index (group 3)
+                \[(\d+)\] # message string index (group 4)
             )?
         )?
-        \s*
-        "(.*)" # quoted string (group 4)
-        \s*
+        [^\S\n]*
+        "([^\n]*)" # quoted string (group 5)
+        [^\S\n]*
     )?
-    $""", re.VERBOSE)
+    (?:\n|\Z)""", re.VERBOSE)
+
+# Same as LINE_MATCHER, for undecoded utf-8 buffers
+BYTES_LINE_MATCHER = re.compile(LINE_MATCHER.pattern.encode('ascii'), re.VERBOSE)
+
+MSGCTXT, MSGID, MSGID_PLURAL = range(3)
+KEYWORDS = {'msgctxt': MSGCTXT, 'msgid': MSGID, 'msgid_plural': MSGID_PLURAL}
+BYTES_KEYWORDS = {b'msgctxt': MSGCTXT, b'msgid': MSGID, b'msgid_plural': MSGID_PLURAL}
+
+START, AFTER_MSGCTXT, AFTER_MSGID, AFTER_MSGID_PLURAL, AFTER_MSGSTR, AFTER_PLURAL_MSGSTR = range(6)
+STATE_NAMES = ('start', 'after msgctxt', 'after msgid', 'after msgid_plural', 'after msgstr', 'after msgstr[N]')
+
+
+# Bump when the parsing results change, this invalidates the compiled catalogs caches
+PARSER_VERSION = 1
+
+CHUNK_SIZE = 64 * 1024
+
+HeaderField = collections.namedtuple('HeaderField', ('field', 'value'))
+Entry = collections.namedtuple('Entry', ('context', 'message', 'plural', 'translations'))
 
 
 def parse_po_filename(filename):
@@ -43,40 +61,172 @@ def parse_po_file(fp, filename=None):
     return po_file.get_catalog()
 
 
+def fill_catalog_from_po_filename(filename, catalog):
+    # XXX: Actually, encoding may be different and specified in the .po file comment
+    with io.open(filename, encoding='utf-8') as po_file:
+        fill_catalog_from_po_file(po_file, catalog, filename)
+
+
+def fill_catalog_from_po_file(fp, catalog, filename=None):
+    """
+    Writes the non-empty translations of the file directly into catalog, with the same keys as PoFile.get_catalog.
+    """
+    for record in iter_entries(fp, filename):
+        if record.__class__ is Entry:
+            msgid = get_msgid(record.message, record.context)
+            if record.plural is not None:
+                for index, translation in record.translations.items():
+                    if translation:
+                        catalog[(msgid, index)] = translation
+            else:
+                translation = record.translations.get(0, '')
+                if translation:
+                    catalog[msgid] = translation
+
+
+def read_header_fields(filename):
+    """
+    Returns the header fields of the file as (field, value) pairs, without parsing the following entries.
+    """
+    header_fields = []
+    for record in iter_filename_entries(filename):
+        if record.__class__ is Entry:
+            break
+        header_fields.append((record.field, record.value))
+    return header_fields
+
+
+def iter_filename_entries(filename):
+    # XXX: Actually, encoding may be different and specified in the .po file comment
+    with io.open(filename, encoding='utf-8') as po_file:
+        for record in iter_entries(po_file, filename):
+            yield record
+
+
+def iter_entries(fp, filename=None):
+    """
+    Yields a HeaderField for each field of the header and an Entry for each message, in file order.
+    The file is read and tokenized by chunks of whole lines, memory use does not depend on the file size.
+    Strings are accumulated as lists of unescaped fragments and only joined once per entry.
+    """
+    match_line = LINE_MATCHER.match
+    keywords = KEYWORDS
+    state = START
+    context = message = plural = translation = current = None
+    plural_translations = {}
+    line_number = 0
+    pending = []
+    while pending is not None:
+        chunk = fp.read(CHUNK_SIZE)
+        if chunk:
+            line_end = chunk.rfind('\n') + 1
+            if line_end == 0:
+                pending.append(chunk)
+                continue
+            pending.append(chunk[:line_end])
+            buffer = ''.join(pending)
+            pending = [chunk[line_end:]]
+        else:
+            buffer = ''.join(pending)
+            pending = None
+        buffer_end = len(buffer)
+        position = 0
+        while position < buffer_end:
+            match = match_line(buffer, position, buffer_end)
+            if match is None:
+                line_end = buffer.find('\n', position)
+                line = buffer[position:] if line_end == -1 else buffer[position:line_end + 1]
+                raise ParseError(filename, line_number, "Invalid syntax: {}".format(line))
+            position = match.end()
+            comment, keyword, msgstr_keyword, plural_index, string = match.groups()
+            if string is not None:
+                try:
+                    if msgstr_keyword is not None:
+                        if state == AFTER_MSGID:
+                            if plural_index is not None:
+                                raise ParseError(
+                                    filename, line_number, "Unexpected plural message index after keyword")
+                            translation = current = [unescape(string) if '\\' in string else string]
+                            state = AFTER_MSGSTR
+                        elif state == AFTER_MSGID_PLURAL or state == AFTER_PLURAL_MSGSTR:
+                            if plural_index is None:
+                                raise ParseError(filename, line_number, "Missing plural message index after keyword")
+                            plural_index = int(plural_index)
+                            if plural_index in plural_translations:
+                                raise ParseError(filename, line_number,
+                                    "Duplicate plural message index: {}".format(plural_index))
+                            current = [unescape(string) if '\\' in string else string]
+                            plural_translations[plural_index] = current
+                            state = AFTER_PLURAL_MSGSTR
+                        else:
+                            raise ParseError(filename, line_number, "Unexpected keyword: {}".format(msgstr_keyword))
+                    elif keyword is None:
+                        if current is None:
+                            raise ParseError(filename, line_number,
+                                "Unexpected string continuation after '{}'".format(STATE_NAMES[state]))
+                        current.append(unescape(string) if '\\' in string else string)
+                    else:
+                        token = keywords[keyword]
+                        if token == MSGID and state != AFTER_MSGID and state != AFTER_MSGID_PLURAL:
+                            if state != AFTER_MSGCTXT:
+                                for record in _make_records(
+                                        state, context, message, plural, translation, plural_translations):
+                                    yield record
+                                context = plural = translation = None
+                                plural_translations = {}
+                            message = current = [unescape(string) if '\\' in string else string]
+                            state = AFTER_MSGID
+                        elif token == MSGCTXT and (state == START or state >= AFTER_MSGSTR):
+                            for record in _make_records(
+                                    state, context, message, plural, translation, plural_translations):
+                                yield record
+                            message = plural = translation = None
+                            plural_translations = {}
+                            context = current = [unescape(string) if '\\' in string else string]
+                            state = AFTER_MSGCTXT
+                        elif token == MSGID_PLURAL and state == AFTER_MSGID:
+                            plural = current = [unescape(string) if '\\' in string else string]
+                            state = AFTER_MSGID_PLURAL
+                        else:
+                            raise ParseError(filename, line_number, "Unexpected keyword: {}".format(keyword))
+                except UnescapeError as e:
+                    raise ParseError(filename, line_number, e)
+            line_number += 1
+    for record in _make_records(state, context, message, plural, translation, plural_translations):
+        yield record
+    if state in (AFTER_MSGCTXT, AFTER_MSGID, AFTER_MSGID_PLURAL):
+        raise ParseError(filename, None, "Unexpected end of file")
+
+
+def _make_records(state, context, message, plural, translation, plural_translations):
+    if message is None:
+        return ()
+    message = ''.join(message)
+    if message == '':
+        if translation is None:
+            return ()
+        records = []
+        for line in ''.join(translation).split('\n'):
+            if len(line):
+                parts = line.partition(':')
+                records.append(HeaderField(parts[0], parts[2].strip()))
+        return records
+    if state == AFTER_MSGSTR:
+        translations = {0: ''.join(translation)}
+    elif state == AFTER_PLURAL_MSGSTR:
+        translations = dict((index, ''.join(text)) for index, text in plural_translations.items())
+    else:
+        translations = {}
+    return (Entry(
+        None if context is None else ''.join(context),
+        message,
+        None if plural is None else ''.join(plural),
+        translations),)
+
+
 class Parser(object):
     def __init__(self, po_file):
-        self.state = 'start'
         self.po_file = po_file
-        self.context = None
-        self.message = None
-        self.plural_message = None
-        self.translated_message = None
-        self.current_plural_index = 0
-        self.plural_translated_messages = {}
-
-    def _store_pending_data(self):
-        if self.message is not None:
-            if self.message == '':
-                for line in self.translated_message.split('\n'):
-                    if len(line):
-                        parts = line.partition(':')
-                        self.po_file.add_header_field(parts[0], parts[2].strip())
-            else:
-                entry = self.po_file.add_entry(self.message, self.plural_message, self.context)
-                if self.state == 'after msgstr':
-                    entry.add_translation(self.translated_message)
-                elif self.state == 'after msgstr[N]':
-                    for index, text in self.plural_translated_messages.items():
-                        entry.add_plural_translation(index, text)
-        self._reset_pending_data()
-
-    def _reset_pending_data(self):
-        self.context = None
-        self.message = None
-        self.plural_message = None
-        self.translated_message = None
-        self.current_plural_index = 0
-        self.plural_translated_messages.clear()
 
     def parse_po_filename(self, filename):
         # XXX: Actually, encoding may be different and specified in the .po file comment
@@ -84,62 +234,14 @@ class Parser(object):
             return self.parse_po_file(po_file, filename)
 
     def parse_po_file(self, fp, filename=None):
-        for line_number, line in enumerate(fp):
-            try:
-                match = MATCHER.match(line)
-                if match is None:
-                    raise ParseError(filename, line_number, "Invalid syntax: {}".format(line))
-                if match.group(1) is not None or match.group(4) is None:
-                    # comment or newline
-                    continue
-                if match.group(2) == 'msgctxt' and self.state in ('start', 'after msgstr', 'after msgstr[N]'):
-                    self._store_pending_data()
-                    self.context = unescape(match.group(4))
-                    self.state = 'after msgctxt'
-                elif match.group(2) == 'msgid' and self.state in ('start', 'after msgctxt', 'after msgstr', 'after msgstr[N]'):
-                    if self.state != 'after msgctxt':
-                        self._store_pending_data()
-                    self.message = unescape(match.group(4))
-                    self.state = 'after msgid'
-                elif match.group(2) == 'msgid_plural' and self.state == 'after msgid':
-                    self.plural_message = unescape(match.group(4))
-                    self.state = 'after msgid_plural'
-                elif match.group(2) == 'msgstr' and self.state in ('after msgid', 'after msgid_plural', 'after msgstr[N]'):
-                    if self.state == 'after msgid':
-                        if match.group(3) is not None:
-                            raise ParseError(filename, line_number, "Unexpected plural message index after keyword")
-                        self.translated_message = unescape(match.group(4))
-                        self.state = 'after msgstr'
-                    else:
-                        if match.group(3) is None:
-                            raise ParseError(filename, line_number, "Missing plural message index after keyword")
-                        self.current_plural_index = int(match.group(3))
-                        if self.current_plural_index in self.plural_translated_messages:
-                            raise ParseError(filename, line_number,
-                                "Duplicate plural message index: {}".format(self.current_plural_index))
-                        self.plural_translated_messages[self.current_plural_index] = unescape(match.group(4))
-                        self.state = 'after msgstr[N]'
-                elif match.group(2) is None:
-                    if self.state == 'after msgctxt':
-                        self.context += unescape(match.group(4))
-                    elif self.state == 'after msgid':
-                        self.message += unescape(match.group(4))
-                    elif self.state == 'after msgid_plural':
-                        self.plural_message += unescape(match.group(4))
-                    elif self.state == 'after msgstr':
-                        self.translated_message += unescape(match.group(4))
-                    elif self.state == 'after msgstr[N]':
-                        self.plural_translated_messages[self.current_plural_index] += unescape(match.group(4))
-                    else:
-                        raise ParseError(filename, line_number,
-                            "Unexpected string continuation after '{}'".format(self.state))
-                else:
-                    raise ParseError(filename, line_number, "Unexpected keyword: {}".format(match.group(2)))
-            except UnescapeError as e:
-                raise ParseError(filename, line_number, e)
-        self._store_pending_data()
-        if self.state in ('after msgctxt', 'after msgid', 'after msgid_plural'):
-            raise ParseError(filename, None, "Unexpected end of file")
+        po_file = self.po_file
+        for record in iter_entries(fp, filename):
+            if record.__class__ is Entry:
+                entry = po_file.add_entry(record.message, record.plural, record.context)
+                for index, text in record.translations.items():
+                    entry.add_plural_translation(index, text)
+            else:
+                po_file.add_header_field(record.field, record.value)
 
 
 class ParseError(Exception):
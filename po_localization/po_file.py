@@ -4,6 +4,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import gettext
 import re
 from io import StringIO
 from .strings import escape
@@ -24,6 +25,13 @@ class PoFile(object):
             po_file.entries[msgid] = entry.clone()
         return po_file
 
+    def overlay(self):
+        """
+        Returns a PoFile with the same contents, in which entries are only copied when they are modified.
+        Copied entries share their locations with the entries of this PoFile, which must not be modified anymore.
+        """
+        return PoFileOverlay(self)
+
     def add_header_field(self, field, value):
         if field in self._header_index:
             self.header_fields[self._header_index[field]] = (field, value)
@@ -45,20 +53,26 @@ class PoFile(object):
         return entry
 
     def dump(self, fp, include_locations=True, prune_obsoletes=False):
-        needs_blank_line = False
-        if len(self.header_fields):
-            print('msgid ""', file=fp)
-            print('msgstr ""', file=fp)
-            for field, value in self.header_fields:
-                print(r'"{}: {}\n"'.format(field, value), file=fp)
-            needs_blank_line = True
+        needs_blank_line = self.dump_header(fp)
         nplurals = self.get_nplurals()
-        for entry in sorted(self.entries.values(), key=get_entry_sort_key):
+        for entry in sorted(self.get_entries(), key=get_entry_sort_key):
             if needs_blank_line:
                 print('', file=fp)
             needs_blank_line = entry.dump(
                 fp, nplurals, include_locations=include_locations, prune_obsolete=prune_obsoletes)
 
+    def dump_header(self, fp):
+        """
+        Returns whether anything was written.
+        """
+        if len(self.header_fields):
+            print('msgid ""', file=fp)
+            print('msgstr ""', file=fp)
+            for field, value in self.header_fields:
+                print(r'"{}: {}\n"'.format(field, value), file=fp)
+            return True
+        return False
+
     def dumps(self, include_locations=True, prune_obsoletes=False):
         string_file = StringIO()
         self.dump(string_file, include_locations, prune_obsoletes)
@@ -66,10 +80,13 @@ class PoFile(object):
 
     def get_catalog(self):
         catalog = {}
-        for entry in self.entries.values():
+        for entry in self.get_entries():
             entry.fill_catalog(catalog)
         return catalog
 
+    def get_entries(self):
+        return self.entries.values()
+
     def get_nplurals(self):
         plural_field_index = self._header_index.get('Plural-Forms', -1)
         if plural_field_index != -1:
@@ -82,6 +99,85 @@ class PoFile(object):
         return None
 
 
+class PoFileOverlay(PoFile):
+    """
+    PoFile whose entries dict only holds the entries added or modified since it was created from its base PoFile.
+    """
+
+    def __init__(self, base):
+        super(PoFileOverlay, self).__init__()
+        self.base = base
+        for field, value in base.header_fields:
+            self.add_header_field(field, value)
+
+    def clone(self):
+        po_file = PoFile()
+        for field, value in self.header_fields:
+            po_file.add_header_field(field, value)
+        for entry in self.get_entries():
+            po_file.entries[get_msgid(entry.message, entry.context)] = entry.clone()
+        return po_file
+
+    def add_entry(self, message, plural=None, context=None):
+        msgid = get_msgid(message, context)
+        if msgid not in self.entries:
+            base_entry = self.base.entries.get(msgid)
+            if base_entry is not None:
+                self.entries[msgid] = base_entry.overlay()
+        return super(PoFileOverlay, self).add_entry(message, plural, context)
+
+    def get_entries(self):
+        entries = self.entries
+        return [entry for msgid, entry in self.base.entries.items() if msgid not in entries] + list(entries.values())
+
+
+class PoFileTemplate(object):
+    """
+    Sort order and rendered heads of the entries of a PoFile, computed once to dump several overlays of it.
+    The PoFile must not be modified while the template is used.
+    """
+
+    def __init__(self, po_file, include_locations=True):
+        self.po_file = po_file
+        self.include_locations = include_locations
+        self.blocks = []
+        for msgid, entry in po_file.entries.items():
+            self.blocks.append((get_entry_sort_key(entry), msgid, entry, entry.render_head(include_locations)))
+        self.blocks.sort(key=lambda block: block[0])
+
+    def dump(self, overlay, fp, prune_obsoletes=False):
+        """
+        Writes the same as overlay.dump(fp, self.include_locations, prune_obsoletes),
+        overlay must be an overlay of the PoFile of the template.
+        """
+        needs_blank_line = overlay.dump_header(fp)
+        nplurals = overlay.get_nplurals()
+        for entry, head in self._iter_sorted_entries(overlay):
+            if needs_blank_line:
+                print('', file=fp)
+            needs_blank_line = entry.dump(
+                fp, nplurals, include_locations=self.include_locations, prune_obsolete=prune_obsoletes, head=head)
+
+    def _iter_sorted_entries(self, overlay):
+        base_entries = self.po_file.entries
+        overlay_entries = overlay.entries
+        # Entries which are not in the base are merged in, base entries keep their sort key in overlays
+        extra_entries = sorted(
+            ((get_entry_sort_key(entry), entry)
+             for msgid, entry in overlay_entries.items() if msgid not in base_entries),
+            key=lambda extra_entry: extra_entry[0])
+        extra_index = 0
+        for sort_key, msgid, base_entry, head in self.blocks:
+            while extra_index < len(extra_entries) and extra_entries[extra_index][0] < sort_key:
+                yield extra_entries[extra_index][1], None
+                extra_index += 1
+            entry = overlay_entries.get(msgid, base_entry)
+            # The head changes if the translation file made the entry plural
+            yield entry, head if entry.plural == base_entry.plural else None
+        for sort_key, entry in extra_entries[extra_index:]:
+            yield entry, None
+
+
 class TranslationEntry(object):
     MIN_NPLURALS = 2
 
@@ -98,6 +194,15 @@ class TranslationEntry(object):
         entry.translations = self.translations.copy()
         return entry
 
+    def overlay(self):
+        """
+        Returns a copy of the entry which shares its locations, they must not be modified through the copy.
+        """
+        entry = TranslationEntry(self.message, self.plural, self.context)
+        entry.locations = self.locations
+        entry.translations = self.translations.copy()
+        return entry
+
     def add_location(self, filename, lineno):
         self.locations.append((filename, lineno))
 
@@ -118,23 +223,19 @@ class TranslationEntry(object):
             if translation:
                 catalog[msgid] = translation
 
-    def dump(self, fp, nplurals=None, include_locations=True, prune_obsolete=False):
+    def dump(self, fp, nplurals=None, include_locations=True, prune_obsolete=False, head=None):
         """
         If plural, shows exactly 'nplurals' plurals if 'nplurals' is not None, else shows at least min_nplurals.
         All plural index are ordered and consecutive, missing entries are displayed with an empty string.
+        head, if given, is the result of render_head(include_locations).
         """
         if not len(self.locations):
             if prune_obsolete or all(translation == '' for index, translation in self.translations.items()):
                 return False
             else:
                 print('#. obsolete entry', file=fp)
-        if include_locations and len(self.locations):
-            print('#: {}'.format(' '.join('{}:{}'.format(*location) for location in self.locations)), file=fp)
-        if self.context is not None:
-            print('msgctxt {}'.format(multiline_escape(self.context)), file=fp)
-        print('msgid {}'.format(multiline_escape(self.message)), file=fp)
+        fp.write(self.render_head(include_locations) if head is None else head)
         if self.plural is not None:
-            print('msgid_plural {}'.format(multiline_escape(self.plural)), file=fp)
             if nplurals is None:
                 nplurals = self.get_suggested_nplurals()
             for index in range(nplurals):
@@ -143,6 +244,21 @@ class TranslationEntry(object):
             print('msgstr {}'.format(multiline_escape(self.translations.get(0, ''))), file=fp)
         return True
 
+    def render_head(self, include_locations=True):
+        """
+        Returns the lines preceding the translations, which are the same for all locales.
+        """
+        lines = []
+        if include_locations and len(self.locations):
+            lines.append('#: {}'.format(' '.join('{}:{}'.format(*location) for location in self.locations)))
+        if self.context is not None:
+            lines.append('msgctxt {}'.format(multiline_escape(self.context)))
+        lines.append('msgid {}'.format(multiline_escape(self.message)))
+        if self.plural is not None:
+            lines.append('msgid_plural {}'.format(multiline_escape(self.plural)))
+        lines.append('')
+        return '\n'.join(lines)
+
     def get_suggested_nplurals(self):
         if len(self.translations) > 0:
             return max(max(self.translations.keys()) + 1, self.MIN_NPLURALS)
@@ -161,6 +277,26 @@ def multiline_escape(string):
         return '"{}"'.format(escape(string))
 
 
+def get_plural_function(plural_forms):
+    """
+    Returns the function mapping a count to a plural index described by a Plural-Forms header value.
+    Defaults to the germanic plural, like gettext.
+    """
+    if plural_forms is not None:
+        for pair in plural_forms.split(';'):
+            parts = pair.partition('=')
+            if parts[0].strip() == 'plural':
+                try:
+                    return gettext.c2py(parts[2].strip())
+                except ValueError:
+                    break
+    return germanic_plural
+
+
+def germanic_plural(n):
+    return int(n != 1)
+
+
 def get_msgid(message, context=None):
     if context is not None:
         return '{}\x04{}'.format(context, message)
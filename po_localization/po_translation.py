@@ -0,0 +1,33 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import gettext
+import sys
+from django.utils.translation.trans_real import DjangoTranslation, to_language, to_locale
+from .po_file import germanic_plural
+
+
+class PoTranslation(DjangoTranslation):
+    """
+    DjangoTranslation whose catalog is only filled from .po files by the TranslationsLoader.
+    Unlike DjangoTranslation, it does not search nor merge any .mo file when created.
+    """
+
+    def __init__(self, language):
+        # DjangoTranslation.__init__ is skipped on purpose, it is the one loading the .mo files
+        gettext.NullTranslations.__init__(self)
+        self._catalog = {}
+        self.plural = germanic_plural
+        self.domain = 'django'
+        self.localedirs = None
+        if sys.version_info[0] == 2:
+            self.set_output_charset('utf-8')
+        if hasattr(self, 'set_language'):
+            self.set_language(language)
+        else:
+            self._DjangoTranslation__language = language
+            self._DjangoTranslation__to_language = to_language(language)
+            self._DjangoTranslation__locale = to_locale(language)
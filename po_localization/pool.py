@@ -0,0 +1,61 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+# Error raised by the initializer of the current pool process
+_initializer_error = None
+
+
+def map_in_pool(function, items, jobs=1, initializer=None, initializer_arguments=()):
+    """
+    Returns [function(item) for item in items], computed in a pool of 'jobs' processes if possible.
+    Items are submitted one by one in order, so the longest tasks should come first.
+    Falls back to computing everything in the current process when a pool cannot be started.
+    function must be a module-level function and items must be picklable.
+    initializer, if given, is called once by each process of the pool with initializer_arguments,
+    but not in the current process. Unlike items, initializer_arguments are only sent once to each process.
+    If initializer raises, the tasks of the process raise the same error.
+    """
+    items = list(items)
+    if jobs > 1 and len(items) > 1:
+        pool = _create_pool(min(jobs, len(items)), initializer, initializer_arguments)
+        if pool is not None:
+            try:
+                results = pool.map(_run_task, [(function, item) for item in items], chunksize=1)
+            except BaseException:
+                pool.terminate()
+                raise
+            else:
+                pool.close()
+            finally:
+                pool.join()
+            return results
+    return [function(item) for item in items]
+
+
+def _create_pool(processes, initializer=None, initializer_arguments=()):
+    try:
+        import multiprocessing
+        return multiprocessing.Pool(processes, _initialize_process, (initializer, initializer_arguments))
+    except (ImportError, OSError, NotImplementedError):
+        # Some platforms lack a working sem_open or forbid creating processes
+        return None
+
+
+def _initialize_process(initializer, initializer_arguments):
+    # A pool endlessly replaces the processes whose initializer raises, which would hang map_in_pool
+    global _initializer_error
+    if initializer is not None:
+        try:
+            initializer(*initializer_arguments)
+        except Exception as e:
+            _initializer_error = e
+
+
+def _run_task(function_and_item):
+    if _initializer_error is not None:
+        raise _initializer_error
+    function, item = function_and_item
+    return function(item)
@@ -7,6 +7,9 @@ from __future__ import unicode_literals
 import ast
 import io
 
+# Must be increased when the extracted messages change, to invalidate the extraction caches
+EXTRACTOR_VERSION = 1
+
 GETTEXT_FUNCTIONS = ('gettext', 'gettext_lazy', 'gettext_noop', 'ugettext', 'ugettext_lazy', 'ugettext_noop')
 PGETTEXT_FUNCTIONS = ('pgettext', 'pgettext_lazy')
 NGETTEXT_FUNCTIONS = ('ngettext', 'ungettext', 'ngettext_lazy', 'ungettext_lazy')
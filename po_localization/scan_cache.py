@@ -0,0 +1,180 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import fnmatch
+import os
+import re
+import time
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# Listings of directories modified less than this many seconds before being listed are not trusted,
+# the directory may be modified again without changing its modification time
+RACY_DELAY = 2
+
+
+class ScanCache(object):
+    """
+    Cache of directory listings, a directory is only listed again when its own modification time changes.
+    Walking a tree whose directories did not change then costs a single stat per directory.
+    """
+
+    def __init__(self):
+        self._listings = {}
+
+    def walk(self, top):
+        """
+        Yields (dirpath, dirnames, filenames) like os.walk, top-down and without following symbolic links.
+        Directories removed from dirnames by the caller are not walked.
+        """
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            listing = self.list_directory(dirpath)
+            if listing is None:
+                continue
+            dirnames, filenames, linked_dirnames = listing
+            dirnames = list(dirnames)
+            yield dirpath, dirnames, list(filenames)
+            for dirname in reversed(dirnames):
+                if dirname not in linked_dirnames:
+                    stack.append(os.path.join(dirpath, dirname))
+
+    def iter_files(self, root_paths, extensions=None, excluded_patterns=()):
+        """
+        Yields the path of each file of the roots, optionally only the files with one of the extensions.
+        Roots nested in other roots are only walked once.
+        """
+        for root_path in get_outermost_directories(root_paths):
+            for dirpath, dirnames, filenames in walk_excluding(self.walk, root_path, excluded_patterns):
+                for filename in filenames:
+                    if extensions is None or os.path.splitext(filename)[1] in extensions:
+                        yield os.path.join(dirpath, filename)
+
+    def list_directory(self, path):
+        """
+        Returns (dirnames, filenames, linked_dirnames) for the directory, or None if it is not a directory.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._listings.pop(path, None)
+            return None
+        mtime = getattr(stat, 'st_mtime_ns', stat.st_mtime)
+        cached = self._listings.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        listing_time = time.time()
+        try:
+            listing = list_directory(path)
+        except OSError:
+            self._listings.pop(path, None)
+            return None
+        if stat.st_mtime < listing_time - RACY_DELAY:
+            self._listings[path] = (mtime, listing)
+        else:
+            self._listings.pop(path, None)
+        return listing
+
+    def clear(self):
+        self._listings.clear()
+
+
+def list_directory(path):
+    dirnames = []
+    filenames = []
+    linked_dirnames = set()
+    if scandir is not None:
+        for entry in scandir(path):
+            if entry.is_dir():
+                dirnames.append(entry.name)
+                if entry.is_symlink():
+                    linked_dirnames.add(entry.name)
+            else:
+                filenames.append(entry.name)
+    else:
+        for name in os.listdir(path):
+            entry_path = os.path.join(path, name)
+            if os.path.isdir(entry_path):
+                dirnames.append(name)
+                if os.path.islink(entry_path):
+                    linked_dirnames.add(name)
+            else:
+                filenames.append(name)
+    return dirnames, filenames, linked_dirnames
+
+
+def walk_excluding(walk, top, excluded_patterns):
+    """
+    Wraps walk(top), which must behave like os.walk, to skip the files and directories matching excluded_patterns.
+    Like in .gitignore files, patterns containing a slash are matched against the path relative to top,
+    other patterns are matched against the name of each file and directory.
+    Excluded directories are pruned from the walk, they are not even listed.
+    """
+    if not excluded_patterns:
+        for item in walk(top):
+            yield item
+        return
+    path_matcher, name_matcher = compile_patterns(excluded_patterns)
+    top_length = len(os.path.join(top, ''))
+    for dirpath, dirnames, filenames in walk(top):
+        relative_dirpath = dirpath[top_length:].replace(os.sep, '/')
+        relative_prefix = relative_dirpath + '/' if relative_dirpath else ''
+        dirnames[:] = [
+            dirname for dirname in dirnames
+            if not is_excluded(relative_prefix + dirname, dirname, path_matcher, name_matcher)]
+        yield dirpath, dirnames, [
+            filename for filename in filenames
+            if not is_excluded(relative_prefix + filename, filename, path_matcher, name_matcher)]
+
+
+def compile_patterns(patterns):
+    """
+    Returns the regular expressions matching the relative paths and the names excluded by the glob patterns.
+    """
+    path_patterns = []
+    name_patterns = []
+    for pattern in patterns:
+        # A trailing slash is only meant to restrict the pattern to directories, it is ignored here
+        pattern = pattern.rstrip('/')
+        if '/' in pattern:
+            path_patterns.append(fnmatch.translate(pattern.lstrip('/')))
+        elif pattern:
+            name_patterns.append(fnmatch.translate(pattern))
+    return (
+        re.compile('|'.join(path_patterns)) if path_patterns else None,
+        re.compile('|'.join(name_patterns)) if name_patterns else None)
+
+
+def is_excluded(relative_path, name, path_matcher, name_matcher):
+    return ((path_matcher is not None and path_matcher.match(relative_path) is not None) or
+            (name_matcher is not None and name_matcher.match(name) is not None))
+
+
+def get_outermost_directories(directories):
+    """
+    Returns the directories which are not nested in another one, without duplicates.
+    """
+    unique_directories = []
+    normalized_directories = []
+    for directory in directories:
+        normalized_directory = os.path.normpath(os.path.abspath(directory))
+        if normalized_directory not in normalized_directories:
+            unique_directories.append(directory)
+            normalized_directories.append(normalized_directory)
+    return [
+        directory for directory, normalized_directory in zip(unique_directories, normalized_directories)
+        if not any(is_in_directory(normalized_directory, other) for other in normalized_directories)]
+
+
+def is_in_directory(path, directory):
+    return path.startswith(os.path.join(directory, ''))
@@ -0,0 +1,222 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import marshal
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import zlib
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+MAGIC = b'POLC'
+FORMAT_VERSION = 2
+# magic, format version, file size, bucket count, entry count, signature length
+HEADER = struct.Struct(str('<4sIIIII'))
+# key hash, key offset, key length, value offset, value length
+BUCKET = struct.Struct(str('<IIIII'))
+PLURAL_SEPARATOR = b'\x00'
+
+
+def load_catalog(filename, signature, create_catalog):
+    """
+    Returns the shared catalog stored in filename if it was compiled from sources with the same signature.
+    Otherwise the catalog returned by create_catalog is compiled to filename first,
+    if the compiled file cannot be written the created catalog is returned as is.
+    """
+    catalog = open_catalog(filename, signature)
+    if catalog is not None:
+        return catalog
+    catalog = create_catalog()
+    try:
+        write_catalog(filename, catalog, signature)
+        return SharedCatalog(filename)
+    except (IOError, OSError):
+        return catalog
+
+
+def open_catalog(filename, signature):
+    """
+    Returns the shared catalog stored in filename, or None if it is missing, invalid or has another signature.
+    """
+    try:
+        catalog = SharedCatalog(filename)
+    except (IOError, OSError, ValueError, EOFError, TypeError, struct.error):
+        return None
+    return catalog if catalog.signature == signature else None
+
+
+def get_default_cache_dir():
+    """
+    Returns a folder of the system temporary directory which only the current user can write to,
+    or None if it cannot be created or is not safe to use.
+    The folder is private because the files it contains are trusted, they are unmarshalled and memory-mapped.
+    """
+    getuid = getattr(os, 'getuid', None)
+    if getuid is None:
+        # Without users ids, the temporary directory is already private to each user
+        return os.path.join(tempfile.gettempdir(), 'po_localization')
+    uid = getuid()
+    cache_dir = os.path.join(tempfile.gettempdir(), 'po_localization-{}'.format(uid))
+    try:
+        os.mkdir(cache_dir, 0o700)
+    except OSError:
+        pass
+    try:
+        # lstat, so that a symbolic link planted by another user is not followed
+        cache_dir_stat = os.lstat(cache_dir)
+    except OSError:
+        return None
+    if (not stat.S_ISDIR(cache_dir_stat.st_mode) or cache_dir_stat.st_uid != uid or
+            cache_dir_stat.st_mode & 0o077):
+        return None
+    return cache_dir
+
+
+def write_catalog(filename, catalog, signature):
+    """
+    Compiles the catalog into an open-addressing hash table with linear probing, stored in a single file.
+    The file is replaced atomically, processes which mapped the previous version keep using it.
+    """
+    bucket_count = 1
+    while bucket_count < 2 * len(catalog):
+        bucket_count *= 2
+    signature_data = marshal.dumps(signature)
+    data_offset = HEADER.size + len(signature_data) + bucket_count * BUCKET.size
+    buckets = [None] * bucket_count
+    data = []
+    for key, value in catalog.items():
+        key_data = encode_key(key)
+        value_data = value.encode('utf-8')
+        key_hash = get_hash(key_data)
+        index = key_hash & (bucket_count - 1)
+        while buckets[index] is not None:
+            index = (index + 1) & (bucket_count - 1)
+        buckets[index] = (key_hash, data_offset, len(key_data), data_offset + len(key_data), len(value_data))
+        data.append(key_data)
+        data.append(value_data)
+        data_offset += len(key_data) + len(value_data)
+    empty_bucket = BUCKET.pack(0, 0, 0, 0, 0)
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    temp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+    try:
+        with io.open(temp_filename, 'wb') as catalog_file:
+            catalog_file.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, data_offset, bucket_count, len(catalog), len(signature_data)))
+            catalog_file.write(signature_data)
+            catalog_file.write(b''.join(empty_bucket if bucket is None else BUCKET.pack(*bucket) for bucket in buckets))
+            catalog_file.write(b''.join(data))
+        getattr(os, 'replace', os.rename)(temp_filename, filename)
+    except (IOError, OSError):
+        if os.path.exists(temp_filename):
+            os.unlink(temp_filename)
+        raise
+
+
+def encode_key(key):
+    if isinstance(key, tuple):
+        msgid, plural_index = key
+        return msgid.encode('utf-8') + PLURAL_SEPARATOR + str(plural_index).encode('ascii')
+    return key.encode('utf-8')
+
+
+def decode_key(key_data):
+    msgid, separator, plural_index = key_data.partition(PLURAL_SEPARATOR)
+    if separator:
+        return msgid.decode('utf-8'), int(plural_index)
+    return msgid.decode('utf-8')
+
+
+def get_hash(key_data):
+    # Unlike hash(), crc32 is stable across processes
+    return zlib.crc32(key_data) & 0xffffffff
+
+
+class SharedCatalog(Mapping):
+    """
+    Read-only catalog mapping over a compiled catalog file.
+    The file is memory-mapped, so all processes using it share a single copy of the catalog.
+    """
+
+    def __init__(self, filename):
+        with io.open(filename, 'rb') as catalog_file:
+            self._buffer = mmap.mmap(catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < HEADER.size:
+            raise ValueError("Invalid compiled catalog: {}".format(filename))
+        magic, format_version, size, self._bucket_count, self._length, signature_length = HEADER.unpack_from(
+            self._buffer)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError("Invalid compiled catalog: {}".format(filename))
+        self._buckets_offset = HEADER.size + signature_length
+        self._size = len(self._buffer)
+        # Only the header and the file size are checked here, looping over every bucket is too slow
+        # to be done on each opening. The size recorded when writing catches truncated files,
+        # key and value spans are still checked when they are used.
+        bucket_count = self._bucket_count
+        if (size != self._size or bucket_count == 0 or bucket_count & (bucket_count - 1) or
+                self._length >= bucket_count or self._buckets_offset + bucket_count * BUCKET.size > self._size):
+            raise ValueError("Invalid compiled catalog: {}".format(filename))
+        self.filename = filename
+        self.signature = marshal.loads(self._buffer[HEADER.size:self._buckets_offset])
+
+    def __getitem__(self, key):
+        value_span = self._find(key)
+        if value_span is None:
+            raise KeyError(key)
+        value_offset, value_length = value_span
+        return self._buffer[value_offset:value_offset + value_length].decode('utf-8')
+
+    def get(self, key, default=None):
+        value_span = self._find(key)
+        if value_span is None:
+            return default
+        value_offset, value_length = value_span
+        return self._buffer[value_offset:value_offset + value_length].decode('utf-8')
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def _find(self, key):
+        key_data = encode_key(key)
+        key_hash = get_hash(key_data)
+        buffer = self._buffer
+        mask = self._bucket_count - 1
+        index = key_hash & mask
+        # Bounded, so that a corrupt file without empty buckets cannot loop forever
+        for probe in range(self._bucket_count):
+            bucket_hash, key_offset, key_length, value_offset, value_length = BUCKET.unpack_from(
+                buffer, self._buckets_offset + index * BUCKET.size)
+            if value_offset == 0:
+                return None
+            if bucket_hash == key_hash and buffer[key_offset:key_offset + key_length] == key_data:
+                self._check_span(value_offset, value_length)
+                return value_offset, value_length
+            index = (index + 1) & mask
+        return None
+
+    def _check_span(self, offset, length):
+        if offset + length > self._size:
+            raise ValueError("Invalid compiled catalog: {}".format(self.filename))
+
+    def __iter__(self):
+        buffer = self._buffer
+        for index in range(self._bucket_count):
+            bucket_hash, key_offset, key_length, value_offset, value_length = BUCKET.unpack_from(
+                buffer, self._buckets_offset + index * BUCKET.size)
+            if value_offset != 0:
+                self._check_span(key_offset, key_length)
+                yield decode_key(buffer[key_offset:key_offset + key_length])
+
+    def __len__(self):
+        return self._length
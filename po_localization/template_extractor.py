@@ -10,6 +10,9 @@ from django import template
 from django.templatetags import i18n
 from django.utils import six
 
+# Must be increased when the extracted messages change, to invalidate the extraction caches
+EXTRACTOR_VERSION = 1
+
 
 def extract_messages(filename, po_file, printable_filename=None):
     printable_filename = filename if printable_filename is None else printable_filename
@@ -0,0 +1,60 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import random
+from unittest import TestCase
+from po_localization.base_catalog import BaseCatalog
+from po_localization.po_file import PoFile
+
+
+class BaseCatalogTestCase(TestCase):
+    def _get_expected_dump(self, files):
+        po_file = PoFile()
+        for filename, signature, records in files:
+            for message, plural, context, location_filename, lineno in records:
+                po_file.add_entry(message, plural, context).add_location(location_filename, lineno)
+        return po_file.dumps()
+
+    def _update(self, base_catalog, files):
+        base_catalog.update([
+            (filename, signature, records if base_catalog.is_stale(filename, signature) else None)
+            for filename, signature, records in files])
+        return base_catalog.po_file.dumps()
+
+    def test_update(self):
+        files = [
+            ('a.py', 1, [('first', None, None, 'a.py', 1), ('second', None, None, 'a.py', 2)]),
+            ('b.py', 1, [('second', 'seconds', None, 'b.py', 1), ('first', None, 'context', 'b.py', 2)]),
+        ]
+        base_catalog = BaseCatalog()
+        self.assertEqual(self._get_expected_dump(files), self._update(base_catalog, files))
+        files[0] = ('a.py', 2, [('third', None, None, 'a.py', 1)])
+        self.assertEqual(self._get_expected_dump(files), self._update(base_catalog, files))
+        self.assertEqual('seconds', base_catalog.po_file.entries['second'].plural)
+        self.assertNotIn('first', base_catalog.po_file.entries)
+        del files[1]
+        self.assertEqual(self._get_expected_dump(files), self._update(base_catalog, files))
+        self.assertListEqual(['third'], list(base_catalog.po_file.entries))
+
+    def test_random_updates(self):
+        random_generator = random.Random(42)
+        filenames = ['{}.py'.format(index) for index in range(5)]
+        signatures = dict.fromkeys(filenames, 0)
+        contents = dict((filename, []) for filename in filenames)
+        base_catalog = BaseCatalog()
+        for iteration in range(200):
+            filename = random_generator.choice(filenames)
+            signatures[filename] += 1
+            contents[filename] = [
+                (message, random_generator.choice([None, 'plural']), random_generator.choice([None, 'context']),
+                 filename, lineno)
+                for lineno, message in enumerate(random_generator.sample('abcdef', random_generator.randint(0, 4)))]
+            if iteration % 20 == 0:
+                random_generator.shuffle(filenames)
+            files = [
+                (filename, signatures[filename], contents[filename])
+                for filename in filenames if random_generator.random() < 0.9]
+            self.assertEqual(self._get_expected_dump(files), self._update(base_catalog, files))
@@ -0,0 +1,66 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from po_localization.catalog_cache import get_cache_filename, load_catalog
+
+
+class CatalogCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'django.po')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_po_file(self, translation, mtime=None):
+        with io.open(self.filename, 'w', encoding='utf-8') as po_file:
+            po_file.write('msgid "Message to translate"\nmsgstr "{}"\n'.format(translation))
+        if mtime is not None:
+            os.utime(self.filename, (mtime, mtime))
+
+    def test_cache_hit(self):
+        self._write_po_file("Translation 1", mtime=1000000000)
+        self.assertDictEqual({"Message to translate": "Translation 1"}, load_catalog(self.filename))
+        self.assertTrue(os.path.isfile(self.filename + '.cache'))
+        # Same size and modification time: the stale cache cannot be detected and the parser is not run
+        self._write_po_file("Translation 2", mtime=1000000000)
+        self.assertDictEqual({"Message to translate": "Translation 1"}, load_catalog(self.filename))
+
+    def test_stale_cache(self):
+        self._write_po_file("Translation 1", mtime=1000000000)
+        load_catalog(self.filename)
+        self._write_po_file("Translation 2", mtime=1000000001)
+        self.assertDictEqual({"Message to translate": "Translation 2"}, load_catalog(self.filename))
+        self._write_po_file("Translation 3", mtime=1000000001)
+        self.assertDictEqual({"Message to translate": "Translation 2"}, load_catalog(self.filename))
+
+    def test_corrupt_cache(self):
+        self._write_po_file("Translation 1")
+        with io.open(self.filename + '.cache', 'wb') as cache_file:
+            cache_file.write(b'garbage')
+        self.assertDictEqual({"Message to translate": "Translation 1"}, load_catalog(self.filename))
+        with io.open(self.filename + '.cache', 'rb') as cache_file:
+            self.assertNotEqual(b'garbage', cache_file.read())
+
+    def test_cache_dir(self):
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        self._write_po_file("Translation 1")
+        self.assertDictEqual({"Message to translate": "Translation 1"}, load_catalog(self.filename, cache_dir))
+        self.assertFalse(os.path.exists(self.filename + '.cache'))
+        self.assertTrue(os.path.isfile(get_cache_filename(self.filename, cache_dir)))
+        self.assertEqual(cache_dir, os.path.dirname(get_cache_filename(self.filename, cache_dir)))
+
+    def test_unwritable_cache(self):
+        self._write_po_file("Translation 1")
+        cache_dir = os.path.join(self.temp_dir, 'not_a_directory')
+        with io.open(cache_dir, 'wb'):
+            pass
+        self.assertDictEqual({"Message to translate": "Translation 1"}, load_catalog(self.filename, cache_dir))
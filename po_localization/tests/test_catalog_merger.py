@@ -0,0 +1,95 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import random
+import shutil
+import tempfile
+from unittest import TestCase
+from po_localization.catalog_merger import CatalogMerger
+from po_localization.parser import parse_po_filename
+
+
+class CatalogMergerTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_paths = [os.path.join(self.temp_dir, '{}.po'.format(index)) for index in range(3)]
+        self.mtime = 1000000000
+        self.loaded_files = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_po_file(self, file_path, translations):
+        with io.open(file_path, 'w', encoding='utf-8') as po_file:
+            for message, translation in sorted(translations.items()):
+                po_file.write('msgid "{}"\nmsgstr "{}"\n\n'.format(message, translation))
+        # Make sure the modification is visible even with a low mtime resolution
+        self.mtime += 1
+        os.utime(file_path, (self.mtime, self.mtime))
+
+    def _load_file_catalog(self, file_path):
+        self.loaded_files.append(file_path)
+        return parse_po_filename(file_path)
+
+    def _get_expected_catalog(self):
+        catalog = {}
+        for file_path in self.file_paths:
+            catalog.update(parse_po_filename(file_path))
+        return catalog
+
+    def test_override(self):
+        self._write_po_file(self.file_paths[0], {"first": "first 0", "second": "second 0"})
+        self._write_po_file(self.file_paths[1], {"second": "second 1"})
+        self._write_po_file(self.file_paths[2], {"third": "third 2"})
+        merger = CatalogMerger()
+        catalog = merger.merge({}, self.file_paths, self._load_file_catalog)
+        self.assertDictEqual({"first": "first 0", "second": "second 1", "third": "third 2"}, catalog)
+        self.assertListEqual(self.file_paths, self.loaded_files)
+        self.assertListEqual([], merger.get_stale_files(self.file_paths))
+
+        self._write_po_file(self.file_paths[1], {"first": "first 1"})
+        self.assertListEqual([self.file_paths[1]], merger.get_stale_files(self.file_paths))
+        previous_catalog = catalog
+        catalog = merger.merge(catalog, self.file_paths, self._load_file_catalog)
+        self.assertDictEqual({"first": "first 1", "second": "second 0", "third": "third 2"}, catalog)
+        self.assertDictEqual({"first": "first 0", "second": "second 1", "third": "third 2"}, previous_catalog)
+        self.assertListEqual(self.file_paths + [self.file_paths[1]], self.loaded_files)
+
+        self._write_po_file(self.file_paths[0], {})
+        catalog = merger.merge(catalog, self.file_paths, self._load_file_catalog)
+        self.assertDictEqual({"first": "first 1", "third": "third 2"}, catalog)
+
+    def test_other_catalog(self):
+        self._write_po_file(self.file_paths[0], {"first": "first 0"})
+        merger = CatalogMerger()
+        merger.merge({}, self.file_paths[:1], self._load_file_catalog)
+        other_catalog = {"stale": "stale translation"}
+        catalog = merger.merge(other_catalog, self.file_paths[:1], self._load_file_catalog)
+        self.assertDictEqual({"first": "first 0"}, catalog)
+        self.assertDictEqual({"stale": "stale translation"}, other_catalog)
+        self.assertListEqual(self.file_paths[:1], self.loaded_files)
+
+    def test_random_changes(self):
+        random_generator = random.Random(42)
+        for file_path in self.file_paths:
+            self._write_po_file(file_path, {})
+        merger = CatalogMerger()
+        catalog = {}
+        for iteration in range(200):
+            file_path = random_generator.choice(self.file_paths)
+            self._write_po_file(file_path, dict(
+                (message, "{} {}".format(message, iteration))
+                for message in random_generator.sample(["a", "b", "c", "d", "e"], random_generator.randint(0, 5))))
+            catalog = merger.merge(catalog, self.file_paths, self._load_file_catalog)
+            self.assertDictEqual(self._get_expected_catalog(), catalog)
+
+    def test_unchanged(self):
+        self._write_po_file(self.file_paths[0], {"first": "first 0"})
+        merger = CatalogMerger()
+        catalog = merger.merge({}, self.file_paths[:1], self._load_file_catalog)
+        self.assertIs(catalog, merger.merge(catalog, self.file_paths[:1], self._load_file_catalog))
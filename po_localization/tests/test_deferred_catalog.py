@@ -0,0 +1,59 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+from unittest import TestCase
+from po_localization.deferred_catalog import DeferredCatalog
+
+
+class DeferredCatalogTestCase(TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.load_calls = 0
+        self.translation = Translation()
+
+    def _load(self):
+        with self.lock:
+            if isinstance(self.translation._catalog, DeferredCatalog):
+                self.load_calls += 1
+                time.sleep(0.05)
+                self.translation._catalog = {"Message to translate": "Message à traduire"}
+
+    def test_load_on_first_use(self):
+        self.translation._catalog = DeferredCatalog(self.translation, self._load)
+        catalog = self.translation._catalog
+        self.assertEqual(0, self.load_calls)
+        self.assertEqual("Message à traduire", catalog["Message to translate"])
+        self.assertEqual(1, self.load_calls)
+        self.assertIsNone(catalog.get("Missing message"))
+        self.assertEqual(1, len(catalog))
+        self.assertEqual(1, self.load_calls)
+        self.assertIsInstance(self.translation._catalog, dict)
+
+    def test_concurrent_first_uses(self):
+        self.translation._catalog = DeferredCatalog(self.translation, self._load)
+        catalog = self.translation._catalog
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(catalog.get("Message to translate")))
+            for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(["Message à traduire"] * 8, results)
+        self.assertEqual(1, self.load_calls)
+
+    def test_nothing_loaded(self):
+        self.translation._catalog = DeferredCatalog(self.translation, lambda: None)
+        self.assertNotIn("Message to translate", self.translation._catalog)
+        self.assertEqual(0, len(self.translation._catalog))
+
+
+class Translation(object):
+    def __init__(self):
+        self._catalog = {}
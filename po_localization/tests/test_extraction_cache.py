@@ -0,0 +1,124 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from po_localization.extraction_cache import ExtractionCache, extract_records
+
+
+class ExtractionCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_filename = os.path.join(self.temp_dir, 'cache', 'extraction.cache')
+        self.source_filename = os.path.join(self.temp_dir, 'source.txt')
+        self._write_source(['first', 'second', 'first'])
+        self.extracted_filenames = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_source(self, messages, mtime=1000000000):
+        with io.open(self.source_filename, 'w', encoding='utf-8') as source_file:
+            source_file.write('\n'.join(messages))
+        os.utime(self.source_filename, (mtime, mtime))
+
+    def _extractor(self, filename, po_file, printable_filename=None):
+        self.extracted_filenames.append(filename)
+        with io.open(filename, encoding='utf-8') as source_file:
+            for lineno, message in enumerate(source_file.read().split('\n'), 1):
+                po_file.add_entry(message, 'plural', 'context' if lineno == 2 else None).add_location(
+                    printable_filename, lineno)
+
+    def _extract(self, version=1, printable_filename='source.txt', records=None):
+        extraction_cache = ExtractionCache(self.cache_filename, version)
+        extracted_records = extraction_cache.get_records(
+            self._extractor, self.source_filename, printable_filename, records)
+        extraction_cache.save()
+        return extracted_records
+
+    def _extract_without_cache(self, printable_filename='source.txt'):
+        return extract_records(self._extractor, self.source_filename, printable_filename)
+
+    def test_cached(self):
+        expected = self._extract_without_cache()
+        self.assertListEqual(expected, self._extract())
+        self.assertListEqual(expected, [tuple(record) for record in self._extract()])
+        self.assertListEqual([self.source_filename] * 2, self.extracted_filenames)
+
+    def test_records(self):
+        self.assertListEqual([
+            ('first', 'plural', None, 'source.txt', 1),
+            ('second', 'plural', 'context', 'source.txt', 2),
+            ('first', 'plural', None, 'source.txt', 3)], self._extract())
+
+    def test_given_records(self):
+        records = [('given', None, None, 'source.txt', 1)]
+        self.assertListEqual(records, self._extract(records=records))
+        self.assertListEqual(records, [tuple(record) for record in self._extract()])
+        self.assertListEqual([], self.extracted_filenames)
+
+    def test_modified_source(self):
+        self._extract()
+        self._write_source(['third'], mtime=1000000001)
+        self.assertListEqual(self._extract_without_cache(), self._extract())
+        self.assertListEqual([self.source_filename] * 3, self.extracted_filenames)
+
+    def test_changed_version(self):
+        self._extract()
+        self._extract(version=2)
+        self.assertListEqual([self.source_filename] * 2, self.extracted_filenames)
+
+    def test_changed_printable_filename(self):
+        self._extract()
+        self.assertListEqual(self._extract_without_cache('other.txt'), self._extract(printable_filename='other.txt'))
+        self.assertListEqual([self.source_filename] * 3, self.extracted_filenames)
+
+    def test_is_cached(self):
+        extraction_cache = ExtractionCache(self.cache_filename, 1)
+        self.assertFalse(extraction_cache.is_cached(self.source_filename, 'source.txt'))
+        self._extract()
+        extraction_cache = ExtractionCache(self.cache_filename, 1)
+        self.assertTrue(extraction_cache.is_cached(self.source_filename, 'source.txt'))
+        self.assertFalse(extraction_cache.is_cached(self.source_filename, 'other.txt'))
+        self._write_source(['third'], mtime=1000000001)
+        self.assertFalse(extraction_cache.is_cached(self.source_filename, 'source.txt'))
+
+    def test_removed_source(self):
+        self._extract()
+        other_filename = self._write_other_source()
+        extraction_cache = ExtractionCache(self.cache_filename, 1)
+        extraction_cache.get_records(self._extractor, other_filename, 'other.txt')
+        extraction_cache.save()
+        # The source was not used before saving, it is no longer cached
+        self._extract()
+        self.assertListEqual([self.source_filename, other_filename, self.source_filename], self.extracted_filenames)
+
+    def test_keep(self):
+        self._extract()
+        other_filename = self._write_other_source()
+        extraction_cache = ExtractionCache(self.cache_filename, 1)
+        extraction_cache.get_records(self._extractor, other_filename, 'other.txt')
+        extraction_cache.keep(self.source_filename)
+        extraction_cache.save()
+        self._extract()
+        self.assertListEqual([self.source_filename, other_filename], self.extracted_filenames)
+
+    def test_corrupt_cache(self):
+        os.makedirs(os.path.dirname(self.cache_filename))
+        with io.open(self.cache_filename, 'wb') as cache_file:
+            cache_file.write(b'garbage')
+        self.assertListEqual(self._extract_without_cache(), self._extract())
+        self._extract()
+        self.assertListEqual([self.source_filename] * 2, self.extracted_filenames)
+
+    def _write_other_source(self):
+        other_filename = os.path.join(self.temp_dir, 'other.txt')
+        with io.open(other_filename, 'w', encoding='utf-8') as other_file:
+            other_file.write('other')
+        return other_filename
@@ -7,9 +7,11 @@ from __future__ import unicode_literals
 import os
 import shutil
 import tempfile
+import threading
 import time
 from unittest import TestCase
-from po_localization.file_watcher import FileWatcher
+from po_localization.file_watcher import ChangeSet, FileWatcher
+from po_localization.inotify import Inotify
 
 
 class FileWatcherTestCase(TestCase):
@@ -99,6 +101,189 @@ class FileWatcherTestCase(TestCase):
         self.assertEqual(2, operator.list_files_calls)
         self.assertEqual(2, operator.execute_calls)
 
+    def test_generation(self):
+        operator = TestOperator()
+        file_watcher = FileWatcher(operator)
+        self.assertEqual(0, file_watcher.generation)
+        file_watcher.check()
+        self.assertEqual(1, file_watcher.generation)
+        file_watcher.check()
+        self.assertEqual(1, file_watcher.generation)
+        file_watcher.set_dirty()
+        file_watcher.check()
+        self.assertEqual(2, file_watcher.generation)
+
+    def test_non_blocking(self):
+        operator = TestOperator()
+        file_watcher = FileWatcher(operator, blocking=False)
+        file_watcher.check()
+        file_watcher.set_dirty()
+        thread = threading.Thread(target=file_watcher.check)
+        with file_watcher.lock:
+            # Another thread is already checking, the previous execution is used
+            file_watcher.check()
+            self.assertEqual(1, operator.execute_calls)
+            self.assertEqual(1, operator.list_files_calls)
+            thread.start()
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(1, operator.execute_calls)
+        file_watcher.check()
+        self.assertEqual(2, operator.execute_calls)
+
+    def test_non_blocking_first_check(self):
+        operator = TestOperator()
+        file_watcher = FileWatcher(operator, blocking=False)
+        thread = threading.Thread(target=file_watcher.check)
+        with file_watcher.lock:
+            # Nothing was executed yet, the first check has to wait
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+        self.assertEqual(1, operator.execute_calls)
+
+    def test_change_set(self):
+        file_paths = [os.path.join(self.temp_dir, 'file{}.ext'.format(index)) for index in range(3)]
+        for file_path in file_paths:
+            with open(file_path, 'w'):
+                pass
+        start_time = time.time()
+        operator = ChangeSetTestOperator(file_paths[:2])
+        file_watcher = FileWatcher(operator)
+        file_watcher.check()
+        self.assertListEqual([None], operator.change_sets)
+        os.utime(file_paths[0], (0, start_time + 1))
+        operator.files_list = file_paths[::2]
+        file_watcher.check()
+        self.assertEqual(
+            ChangeSet(added=frozenset(file_paths[2:]), modified=frozenset(file_paths[:1]),
+                      removed=frozenset(file_paths[1:2])),
+            operator.change_sets[1])
+        file_watcher.set_dirty()
+        file_watcher.check()
+        self.assertListEqual([None], operator.change_sets[2:])
+
+    def test_change_set_after_failure(self):
+        file_path = os.path.join(self.temp_dir, 'file.ext')
+        operator = ChangeSetTestOperator((file_path,))
+        file_watcher = FileWatcher(operator)
+        file_watcher.check()
+        with open(file_path, 'w'):
+            pass
+        operator.fail = True
+        self.assertRaises(ValueError, file_watcher.check)
+        operator.fail = False
+        file_watcher.check()
+        self.assertEqual(ChangeSet(frozenset([file_path]), frozenset(), frozenset()), operator.change_sets[2])
+
+
+class InotifyFileWatcherTestCase(TestCase):
+    def setUp(self):
+        try:
+            Inotify().close()
+        except OSError:
+            self.skipTest("inotify is not available")
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'sub', 'file.ext')
+        os.mkdir(os.path.dirname(self.file_path))
+        with open(self.file_path, 'w'):
+            pass
+        self.operator = DirectoriesTestOperator((self.file_path,), (self.temp_dir,))
+        self.file_watcher = FileWatcher(self.operator, use_inotify=True)
+
+    def tearDown(self):
+        self.file_watcher.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_no_change(self):
+        self.file_watcher.check()
+        self.assertIsNotNone(self.file_watcher.inotify)
+        self.file_watcher.check()
+        self.file_watcher.check()
+        self.assertEqual(1, self.operator.list_files_calls)
+        self.assertEqual(1, self.operator.execute_calls)
+
+    def test_touch_file(self):
+        self.file_watcher.check()
+        os.utime(self.file_path, (0, time.time() + 1))
+        self.file_watcher.check()
+        self.assertEqual(2, self.operator.list_files_calls)
+        self.assertEqual(2, self.operator.execute_calls)
+        self.file_watcher.check()
+        self.assertEqual(2, self.operator.list_files_calls)
+
+    def test_created_directory(self):
+        self.file_watcher.check()
+        file_path = os.path.join(self.temp_dir, 'new', 'file.ext')
+        os.mkdir(os.path.dirname(file_path))
+        self.file_watcher.check()
+        self.assertEqual(1, self.operator.execute_calls)
+        self.operator.files_list = (self.file_path, file_path)
+        with open(file_path, 'w'):
+            pass
+        self.file_watcher.check()
+        self.assertEqual(2, self.operator.execute_calls)
+
+    def test_missing_directory(self):
+        directory = os.path.join(self.temp_dir, 'missing', 'directory')
+        self.operator.directories_list = (directory,)
+        self.file_watcher.check()
+        self.assertIsNotNone(self.file_watcher.inotify)
+        # Parents of missing directories are not watched
+        os.mkdir(os.path.dirname(directory))
+        with open(os.path.join(self.temp_dir, 'unrelated.ext'), 'w'):
+            pass
+        self.file_watcher.check()
+        self.assertEqual(1, self.operator.list_files_calls)
+
+    def test_shared_instance(self):
+        other_directory = tempfile.mkdtemp()
+        other_operator = DirectoriesTestOperator((), (other_directory,))
+        other_file_watcher = FileWatcher(other_operator, use_inotify=True)
+        try:
+            self.file_watcher.check()
+            other_file_watcher.check()
+            self.assertIs(self.file_watcher.inotify.shared_inotify, other_file_watcher.inotify.shared_inotify)
+            # Events are only reported to the watchers of their directory
+            with open(os.path.join(other_directory, 'file.ext'), 'w'):
+                pass
+            self.file_watcher.check()
+            other_file_watcher.check()
+            self.assertEqual(1, self.operator.list_files_calls)
+            self.assertEqual(2, other_operator.list_files_calls)
+        finally:
+            other_file_watcher.close()
+            shutil.rmtree(other_directory)
+
+    def test_shared_directory(self):
+        other_operator = DirectoriesTestOperator((self.file_path,), (self.temp_dir,))
+        other_file_watcher = FileWatcher(other_operator, use_inotify=True)
+        self.file_watcher.check()
+        other_file_watcher.check()
+        # Closing a watcher keeps the watches of the other watchers of the same directories
+        other_file_watcher.close()
+        os.utime(self.file_path, (0, time.time() + 1))
+        self.file_watcher.check()
+        self.assertEqual(2, self.operator.list_files_calls)
+
+    def test_excluded_directory(self):
+        self.operator.excluded_patterns = ('excluded',)
+        excluded_directory = os.path.join(self.temp_dir, 'excluded')
+        os.mkdir(excluded_directory)
+        self.file_watcher.check()
+        with open(os.path.join(excluded_directory, 'file.ext'), 'w'):
+            pass
+        self.file_watcher.check()
+        self.assertEqual(1, self.operator.list_files_calls)
+
+    def test_fallback(self):
+        self.file_watcher.inotify_failed = True
+        self.file_watcher.check()
+        self.file_watcher.check()
+        self.assertIsNone(self.file_watcher.inotify)
+        self.assertEqual(2, self.operator.list_files_calls)
+
 
 class TestOperator(object):
     def __init__(self, files_list=()):
@@ -112,3 +297,27 @@ class TestOperator(object):
     def list_files(self):
         self.list_files_calls += 1
         return self.files_list
+
+
+class DirectoriesTestOperator(TestOperator):
+    def __init__(self, files_list=(), directories_list=()):
+        super(DirectoriesTestOperator, self).__init__(files_list)
+        self.directories_list = directories_list
+
+    def list_directories(self):
+        return self.directories_list
+
+
+class ChangeSetTestOperator(TestOperator):
+    accepts_change_set = True
+
+    def __init__(self, files_list=()):
+        super(ChangeSetTestOperator, self).__init__(files_list)
+        self.change_sets = []
+        self.fail = False
+
+    def execute(self, change_set=None):
+        super(ChangeSetTestOperator, self).execute()
+        self.change_sets.append(change_set)
+        if self.fail:
+            raise ValueError("Operator failure")
@@ -18,6 +18,7 @@ import os
 import shutil
 import sys
 import tempfile
+import threading
 import time
 import unittest
 from django.test import SimpleTestCase
@@ -227,6 +228,63 @@ msgstr[1] "%(counter)s éléments"
             management.call_command('update_translations')
             self.assertTrue(os.path.exists(self.locale_path))
 
+    def test_management_command_jobs(self):
+        local_settings = {
+            'AUTO_UPDATE_TRANSLATIONS': False,
+            'INSTALLED_APPS': (
+                'po_localization',
+                'test_app',
+            ),
+            'LANGUAGES': (
+                ('fr', 'French'),
+                ('en', 'English'),
+            ),
+            'MIDDLEWARE_CLASSES': (
+                'po_localization.middleware.PoLocalizationMiddleware',
+            ),
+            'UPDATE_TRANSLATIONS_PACKAGES': (
+                'test_app',
+            ),
+        }
+        translation_filenames = [
+            os.path.join(self.locale_path, 'fr/LC_MESSAGES/django.po'),
+            os.path.join(self.locale_path, 'en/LC_MESSAGES/django.po')]
+        with self.settings(**local_settings):
+            management.call_command('update_translations', verbosity=0)
+            serial_contents = []
+            for translation_filename in translation_filenames:
+                with io.open(translation_filename, 'r', encoding='utf-8') as translation_file:
+                    serial_contents.append(translation_file.read())
+                os.unlink(translation_filename)
+            management.call_command('update_translations', jobs=2, verbosity=0)
+            for translation_filename, serial_content in zip(translation_filenames, serial_contents):
+                with io.open(translation_filename, 'r', encoding='utf-8') as translation_file:
+                    self.assertEqual(serial_content, translation_file.read())
+
+    def test_management_command_unchanged(self):
+        local_settings = {
+            'AUTO_UPDATE_TRANSLATIONS': False,
+            'INSTALLED_APPS': (
+                'po_localization',
+                'test_app',
+            ),
+            'LANGUAGES': (
+                ('fr', 'French'),
+            ),
+            'MIDDLEWARE_CLASSES': (
+                'po_localization.middleware.PoLocalizationMiddleware',
+            ),
+            'UPDATE_TRANSLATIONS_PACKAGES': (
+                'test_app',
+            ),
+        }
+        french_translation_filename = os.path.join(self.locale_path, 'fr/LC_MESSAGES/django.po')
+        with self.settings(**local_settings):
+            management.call_command('update_translations', verbosity=0)
+            os.utime(french_translation_filename, (1000000000, 1000000000))
+            management.call_command('update_translations', verbosity=0)
+            self.assertEqual(1000000000, os.path.getmtime(french_translation_filename))
+
     def test_custom_locale_paths(self):
         local_settings = {
             'AUTO_RELOAD_TRANSLATIONS': True,
@@ -250,6 +308,40 @@ msgstr[1] "%(counter)s éléments"
             response = self.client.get('')
             self.assertEqual("chaîne de test de projet", response.content.decode('utf-8'))
 
+    def test_non_default_language(self):
+        local_settings = {
+            'AUTO_RELOAD_TRANSLATIONS': True,
+            'INSTALLED_APPS': (
+                'po_localization',
+            ),
+            'MIDDLEWARE_CLASSES': (
+                'po_localization.middleware.PoLocalizationMiddleware',
+            ),
+            'LOCALE_PATHS': (
+                os.path.join(self.temp_dir, 'test_project/locale'),
+            ),
+            'LANGUAGE_CODE': 'en',
+            'LANGUAGES': (
+                ('fr', 'French'),
+                ('en', 'English'),
+            ),
+            'ROOT_URLCONF': 'test_project.urls'
+        }
+        english_translation_filename = os.path.join(self.temp_dir, 'test_project/locale/en/LC_MESSAGES/django.po')
+        os.makedirs(os.path.dirname(english_translation_filename))
+        with io.open(english_translation_filename, 'w', encoding='utf-8') as translation_file:
+            translation_file.write(
+"""
+msgid "english only string"
+msgstr "English only string"
+""")
+        with self.settings(**local_settings):
+            self.assertEqual("test project string", self.client.get('').content.decode('utf-8'))
+            with translation.override('fr'):
+                self.assertEqual("chaîne de test de projet", translation.ugettext("test project string"))
+                # Missing translations are looked up in the default language
+                self.assertEqual("English only string", translation.ugettext("english only string"))
+
     @unittest.skipIf(django.VERSION[:2] < (1, 7), "app registry not available in django<1.7")
     def test_app_registry(self):
         local_settings = {
@@ -324,3 +416,125 @@ msgstr "translation supplémentaire"
 """)
             self.client.get('')
             self.assertEqual("extra translation", translation.ugettext("extra translation"))
+
+    def _get_reload_settings(self, **extra_settings):
+        local_settings = {
+            'AUTO_RELOAD_TRANSLATIONS': True,
+            'INSTALLED_APPS': (
+                'po_localization',
+            ),
+            'MIDDLEWARE_CLASSES': (
+                'po_localization.middleware.PoLocalizationMiddleware',
+            ),
+            'LOCALE_PATHS': (
+                os.path.join(self.temp_dir, 'test_project/locale'),
+            ),
+            'LANGUAGE_CODE': 'fr',
+            'LANGUAGES': (
+                ('fr', 'French'),
+                ('de', 'German'),
+            ),
+            'ROOT_URLCONF': 'test_project.urls',
+        }
+        local_settings.update(extra_settings)
+        return local_settings
+
+    def _add_translation(self, locale, message, translated_message):
+        translation_filename = os.path.join(self.temp_dir, 'test_project/locale', locale, 'LC_MESSAGES/django.po')
+        if not os.path.isdir(os.path.dirname(translation_filename)):
+            os.makedirs(os.path.dirname(translation_filename))
+        previous_mtime = os.path.getmtime(translation_filename) if os.path.exists(translation_filename) else 0
+        with io.open(translation_filename, 'a', encoding='utf-8') as translation_file:
+            translation_file.write('\nmsgid "{}"\nmsgstr "{}"\n'.format(message, translated_message))
+        # Makes sure the modification is noticed whatever the resolution of mtimes
+        mtime = max(time.time(), previous_mtime + 10)
+        os.utime(translation_filename, (mtime, mtime))
+
+    def _get_catalog(self, language):
+        from django.utils.translation import trans_real
+        return trans_real._translations[language]._catalog
+
+    def test_reload_modified_locale_only(self):
+        from django.utils.translation import trans_real
+        from po_localization.po_translation import PoTranslation
+        self._add_translation('de', "test project string", "Testprojektzeichenkette")
+        with self.settings(**self._get_reload_settings()):
+            self.client.get('')
+            self.assertIsInstance(trans_real._translations['fr'], PoTranslation)
+            self.assertIsInstance(trans_real._translations['de'], PoTranslation)
+            french_catalog = self._get_catalog('fr')
+            german_catalog = self._get_catalog('de')
+            self._add_translation('fr', "extra translation", "traduction supplémentaire")
+            self.client.get('')
+            self.assertEqual("traduction supplémentaire", translation.ugettext("extra translation"))
+            # The catalog of the modified locale was swapped, the other one was not reloaded
+            self.assertIsNot(french_catalog, self._get_catalog('fr'))
+            self.assertNotIn("extra translation", french_catalog)
+            self.assertIs(german_catalog, self._get_catalog('de'))
+            with translation.override('de'):
+                self.assertEqual("Testprojektzeichenkette", translation.ugettext("test project string"))
+
+    def test_load_on_demand(self):
+        from po_localization.deferred_catalog import DeferredCatalog
+        self._add_translation('de', "test project string", "Testprojektzeichenkette")
+        with self.settings(**self._get_reload_settings(LOAD_TRANSLATIONS_ON_DEMAND=True)):
+            self.assertEqual("chaîne de test de projet", self.client.get('').content.decode('utf-8'))
+            self.assertIsInstance(self._get_catalog('de'), DeferredCatalog)
+            with translation.override('de'):
+                self.assertEqual("Testprojektzeichenkette", translation.ugettext("test project string"))
+            self.assertNotIsInstance(self._get_catalog('de'), DeferredCatalog)
+            # Once loaded, the locale is reloaded like the others
+            self._add_translation('de', "extra translation", "Zusätzliche Übersetzung")
+            self.client.get('')
+            with translation.override('de'):
+                self.assertEqual("Zusätzliche Übersetzung", translation.ugettext("extra translation"))
+
+    def test_non_blocking_reload(self):
+        from po_localization.middleware import PoLocalizationMiddleware
+        with self.settings(**self._get_reload_settings(AUTO_RELOAD_TRANSLATIONS_BLOCKING=False)):
+            middleware = PoLocalizationMiddleware()
+            middleware.process_request(None)
+            self.assertEqual("chaîne de test de projet", translation.ugettext("test project string"))
+            self._add_translation('fr', "extra translation", "traduction supplémentaire")
+            french_watcher = [
+                watcher for watcher in middleware.translations_loader_watchers if watcher.operator.locale == 'fr'][0]
+            # While another thread reloads, requests do not wait and keep using the current catalog
+            request_thread = threading.Thread(target=middleware.process_request, args=(None,))
+            with french_watcher.lock:
+                request_thread.start()
+                request_thread.join(10)
+                self.assertFalse(request_thread.is_alive())
+                self.assertEqual("extra translation", translation.ugettext("extra translation"))
+            request_thread.join()
+            middleware.process_request(None)
+            self.assertEqual("traduction supplémentaire", translation.ugettext("extra translation"))
+
+    def test_watcher_thread(self):
+        from po_localization.middleware import PoLocalizationMiddleware
+        local_settings = self._get_reload_settings(
+            TRANSLATIONS_WATCHER_THREAD=True, TRANSLATIONS_WATCHER_INTERVAL=0.05)
+        with self.settings(**local_settings):
+            middleware = PoLocalizationMiddleware()
+            try:
+                middleware.process_request(None)
+                self.assertTrue(middleware.watcher_thread.is_alive())
+                self._add_translation('fr', "extra translation", "traduction supplémentaire")
+                # Reloaded by the thread, without any request
+                deadline = time.time() + 10
+                while translation.ugettext("extra translation") == "extra translation" and time.time() < deadline:
+                    time.sleep(0.05)
+                self.assertEqual("traduction supplémentaire", translation.ugettext("extra translation"))
+            finally:
+                middleware.watcher_thread.stop()
+
+    def test_catalog_types(self):
+        for catalog_type in ('dict', 'lazy', 'shared'):
+            local_settings = self._get_reload_settings(
+                TRANSLATIONS_CATALOG_TYPE=catalog_type,
+                TRANSLATIONS_CACHE_DIR=os.path.join(self.temp_dir, 'cache'))
+            with self.settings(**local_settings):
+                self.assertEqual("chaîne de test de projet", self.client.get('').content.decode('utf-8'))
+                message = "{} translation".format(catalog_type)
+                self._add_translation('fr', message, "traduction {}".format(catalog_type))
+                self.client.get('')
+                self.assertEqual("traduction {}".format(catalog_type), translation.ugettext(message))
@@ -0,0 +1,174 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from po_localization.lazy_catalog import LazyCatalog
+from po_localization.parser import ParseError, parse_po_filename
+
+
+class LazyCatalogTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_po_file(self, name, file_content):
+        filename = os.path.join(self.temp_dir, name)
+        with io.open(filename, 'w', encoding='utf-8') as po_file:
+            po_file.write(file_content)
+        return filename
+
+    def test_lookup(self):
+        filename = self._write_po_file('django.po', r"""
+msgid ""
+msgstr ""
+"Language: fr\n"
+
+msgid "Empty message"
+msgstr ""
+
+msgid "Message to translate"
+msgstr ""
+"Message "
+# Comment
+"traduit\n"
+
+msgctxt "Context"
+msgid "Message to translate"
+msgid_plural "Messages to translate"
+msgstr[0] "Message à traduire"
+msgstr[1] "Messages à traduire"
+""")
+        catalog = LazyCatalog()
+        catalog.add_po_filename(filename)
+        self.assertEqual(3, len(catalog))
+        self.assertNotIn("Empty message", catalog)
+        self.assertIn("Message to translate", catalog)
+        self.assertEqual("Message traduit\n", catalog["Message to translate"])
+        self.assertEqual("Messages à traduire", catalog.get(("Context\x04Message to translate", 1)))
+        self.assertIsNone(catalog.get("Missing message"))
+        self.assertRaises(KeyError, catalog.__getitem__, ("Context\x04Message to translate", 2))
+        self.assertDictEqual(dict(catalog), parse_po_filename(filename))
+
+    def test_override(self):
+        first_filename = self._write_po_file('first.po', """
+msgid "First message"
+msgstr "First translation"
+
+msgid "Second message"
+msgstr "Second translation"
+""")
+        second_filename = self._write_po_file('second.po', """
+msgid "Second message"
+msgstr "Overridden translation"
+
+msgid "First message"
+msgstr ""
+""")
+        catalog = LazyCatalog()
+        catalog.add_po_filename(first_filename)
+        self.assertEqual("Second translation", catalog["Second message"])
+        catalog.add_po_filename(second_filename)
+        catalog.update({"Third message": "Third translation"})
+        self.assertDictEqual(dict(catalog), {
+            "First message": "First translation",
+            "Second message": "Overridden translation",
+            "Third message": "Third translation"})
+        del catalog["First message"]
+        self.assertNotIn("First message", catalog)
+        catalog.clear()
+        self.assertEqual(0, len(catalog))
+
+    def test_changed_file(self):
+        filename = self._write_po_file('django.po', """
+msgid "Message to translate"
+msgstr "Translated message"
+""")
+        catalog = LazyCatalog()
+        catalog.add_po_filename(filename)
+        self._write_po_file('django.po', "")
+        self.assertIsNone(catalog.get("Message to translate"))
+        self.assertNotIn("Message to translate", catalog)
+        self.assertEqual(0, len(catalog))
+
+    def test_changed_file_views(self):
+        filename = self._write_po_file('django.po', """
+msgid "Message to translate"
+msgstr "Translated message"
+
+msgid "Other message"
+msgstr "Other translation"
+""")
+        catalog = LazyCatalog()
+        catalog.add_po_filename(filename)
+        self.assertEqual("Translated message", catalog["Message to translate"])
+        self._write_po_file('django.po', "")
+        self.assertNotIn("Other message", catalog)
+        self.assertDictEqual({"Message to translate": "Translated message"}, dict(catalog))
+
+    def test_replaced_file(self):
+        filename = self._write_po_file('django.po', """
+msgid "Message to translate"
+msgstr "Translated message"
+""")
+        catalog = LazyCatalog()
+        catalog.add_po_filename(filename)
+        mtime = os.path.getmtime(filename)
+        replacement_filename = self._write_po_file('replacement.po', """
+msgid "Message to translate"
+msgstr "Replaced message!"
+""")
+        os.utime(replacement_filename, (mtime, mtime))
+        os.rename(replacement_filename, filename)
+        self.assertNotIn("Message to translate", catalog)
+
+    def test_concurrent_lookups(self):
+        filename = self._write_po_file('django.po', "".join(
+            'msgid "Message {0}"\nmsgstr "Translation {0}"\n\n'.format(index) for index in range(1000)))
+        catalog = LazyCatalog()
+        catalog.add_po_filename(filename)
+        errors = []
+
+        def look_up():
+            try:
+                for index in range(1000):
+                    catalog["Message {}".format(index)]
+            except KeyError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=look_up) for thread_index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual([], errors)
+        self.assertEqual(1000, len(list(catalog)))
+
+    def test_invalid_encoding(self):
+        filename = os.path.join(self.temp_dir, 'django.po')
+        with io.open(filename, 'wb') as po_file:
+            po_file.write(b'msgid "Message to translate"\nmsgstr "Invalid \xe9 translation"\n')
+        self.assertRaises(UnicodeDecodeError, LazyCatalog().add_po_filename, filename)
+        self.assertRaises(UnicodeDecodeError, parse_po_filename, filename)
+
+    def test_empty_file(self):
+        catalog = LazyCatalog()
+        catalog.add_po_filename(self._write_po_file('django.po', ""))
+        self.assertEqual(0, len(catalog))
+
+    def test_parse_error(self):
+        for file_content in (
+                'msgid "Message to translate"\nmsgstr "Translated \\q message"\n',
+                'msgid "Message to translate"\nmsgstr[0] "Translated message"\n',
+                'msgid "Message to translate"\n'):
+            filename = self._write_po_file('django.po', file_content)
+            self.assertRaises(ParseError, LazyCatalog().add_po_filename, filename)
@@ -7,7 +7,9 @@ from __future__ import unicode_literals
 import os
 from io import StringIO
 from unittest import TestCase
-from po_localization.parser import Parser, ParseError, parse_po_file, parse_po_filename
+from po_localization.parser import (
+    Entry, HeaderField, Parser, ParseError, fill_catalog_from_po_file, fill_catalog_from_po_filename, iter_entries,
+    iter_filename_entries, parse_po_file, parse_po_filename, read_header_fields)
 from po_localization.po_file import PoFile
 
 class ParserTestCase(TestCase):
@@ -350,3 +352,150 @@ msgstr ""
         except ParseError as error:
             self.assertEqual("the error message", "{}".format(error))
 
+
+    def test_multiline_strings(self):
+        self._parse_and_expect("""
+msgctxt "First "
+"context"
+msgid ""
+"Message "
+"to translate"
+msgid_plural "Messages "
+"to translate"
+msgstr[0] "Translated "
+"message"
+msgstr[1] ""
+"Translated "
+"messages"
+""", {
+            ("First context\x04Message to translate", 0): "Translated message",
+            ("First context\x04Message to translate", 1): "Translated messages"
+        })
+
+    def test_long_multiline_string(self):
+        lines = ['Line {}\n'.format(index) for index in range(5000)]
+        file_content = 'msgid "Message to translate"\nmsgstr ""\n' + ''.join(
+            '"Line {}\\n"\n'.format(index) for index in range(5000))
+        self._parse_and_expect(file_content, {"Message to translate": ''.join(lines)})
+
+    def test_windows_line_endings(self):
+        self._parse_and_expect('msgid "Message to translate"\r\nmsgstr "Translated message"\r\n', {
+            "Message to translate": "Translated message"
+        })
+
+    def test_error_line_number(self):
+        def get_error_line_number(file_content):
+            try:
+                parse_po_file(StringIO(file_content), 'filename.po')
+            except ParseError as error:
+                return error.line_number
+        self.assertEqual(2, get_error_line_number("""
+msgid "Message to translate"
+poney "Poney"
+"""))
+        self.assertEqual(3, get_error_line_number("""
+msgid "Message to translate"
+msgstr "Translated message"
+msgstr "Translated message"
+"""))
+        self.assertEqual(2, get_error_line_number("""
+msgid "Message to translate"
+msgstr "Translated \\q message"
+"""))
+        self.assertEqual(0, get_error_line_number('"Continuation"'))
+        self.assertIsNone(get_error_line_number("""
+msgid "Message to translate"
+"""))
+
+
+class IterEntriesTestCase(TestCase):
+    def test_records(self):
+        file_object = StringIO(r"""
+msgid ""
+msgstr ""
+"Language: fr\n"
+"Plural-Forms: nplurals=2; plural=(n > 1)\n"
+
+msgid "Message to translate"
+msgstr "Translated message"
+
+msgctxt "Context"
+msgid "Message to translate"
+msgid_plural "Messages to translate"
+msgstr[0] "Translated message"
+msgstr[1] "Translated messages"
+""")
+        self.assertListEqual(list(iter_entries(file_object)), [
+            HeaderField('Language', 'fr'),
+            HeaderField('Plural-Forms', 'nplurals=2; plural=(n > 1)'),
+            Entry(None, "Message to translate", None, {0: "Translated message"}),
+            Entry("Context", "Message to translate", "Messages to translate", {
+                0: "Translated message",
+                1: "Translated messages"})])
+
+    def test_incremental_reading(self):
+        file_content = ''.join(
+            'msgid "Message {0}"\nmsgstr "Translated message {0}"\n\n'.format(index) for index in range(10000))
+        file_object = StringIO(file_content)
+        entries = iter_entries(file_object)
+        self.assertEqual(Entry(None, "Message 0", None, {0: "Translated message 0"}), next(entries))
+        self.assertLess(file_object.tell(), len(file_content))
+        self.assertEqual(9999, sum(1 for entry in entries))
+        self.assertEqual(file_object.tell(), len(file_content))
+
+    def test_error_after_last_entry(self):
+        entries = iter_entries(StringIO("""
+msgid "Message to translate"
+"""))
+        self.assertEqual(Entry(None, "Message to translate", None, {}), next(entries))
+        self.assertRaises(ParseError, next, entries)
+
+    def test_read_header_fields(self):
+        filename = os.path.join(os.path.dirname(__file__), 'sample.po')
+        header_fields = read_header_fields(filename)
+        self.assertEqual(8, len(header_fields))
+        self.assertEqual(('Plural-Forms', 'nplurals=2; plural=(n > 1)'), header_fields[-1])
+
+    def test_real_file(self):
+        filename = os.path.join(os.path.dirname(__file__), 'sample.po')
+        entries = [record for record in iter_filename_entries(filename) if isinstance(record, Entry)]
+        self.assertListEqual(entries, [
+            Entry("Context", "Message to translate", "Messages to translate", {
+                0: "Message à traduire",
+                1: "Messages à traduire"})])
+
+
+class FillCatalogTestCase(TestCase):
+    def test_fill_catalog(self):
+        catalog = {
+            "Untouched message": "Untouched translation",
+            "Empty message": "Previous translation",
+            "Message to translate": "Previous translation"}
+        fill_catalog_from_po_file(StringIO(r"""
+msgid ""
+msgstr ""
+"Language: fr\n"
+
+msgid "Empty message"
+msgstr ""
+
+msgid "Message to translate"
+msgstr "Translated message"
+
+msgctxt "Context"
+msgid "Message to translate"
+msgid_plural "Messages to translate"
+msgstr[0] "Translated message"
+msgstr[1] ""
+"""), catalog)
+        self.assertDictEqual(catalog, {
+            "Untouched message": "Untouched translation",
+            "Empty message": "Previous translation",
+            "Message to translate": "Translated message",
+            ("Context\x04Message to translate", 0): "Translated message"})
+
+    def test_same_as_parse(self):
+        filename = os.path.join(os.path.dirname(__file__), 'sample.po')
+        catalog = {}
+        fill_catalog_from_po_filename(filename, catalog)
+        self.assertDictEqual(catalog, parse_po_filename(filename))
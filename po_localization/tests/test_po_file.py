@@ -4,8 +4,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
 from unittest import TestCase
-from po_localization.po_file import PoFile
+from po_localization.po_file import PoFile, PoFileTemplate, get_plural_function
 
 
 class PoFileTestCase(TestCase):
@@ -232,3 +233,81 @@ msgstr[1] ""
 "multiline\n"
 "plural\n"
 """, po_file.dumps(include_locations=False, prune_obsoletes=False))
+
+
+class PoFileOverlayTestCase(TestCase):
+    def setUp(self):
+        self.base = PoFile()
+        self.base.add_entry("first").add_location("file.py", 1)
+        self.base.add_entry("second").add_location("file.py", 2)
+        self.base.add_entry("plural").add_location("file.py", 3)
+
+    def _fill(self, po_file):
+        po_file.add_header_field("Language", "fr")
+        po_file.add_entry("first").add_translation("premier")
+        po_file.add_entry("plural", "plurals").add_plural_translation(1, "pluriels")
+        po_file.add_entry("obsolete").add_translation("obsolète")
+
+    def test_same_as_clone(self):
+        overlay = self.base.overlay()
+        self._fill(overlay)
+        clone = self.base.clone()
+        self._fill(clone)
+        self.assertEqual(clone.dumps(), overlay.dumps())
+        self.assertDictEqual(clone.get_catalog(), overlay.get_catalog())
+        self.assertEqual(clone.dumps(), overlay.clone().dumps())
+
+    def test_base_unchanged(self):
+        dump = self.base.dumps()
+        overlay = self.base.overlay()
+        self._fill(overlay)
+        self.assertEqual(dump, self.base.dumps())
+        self.assertIs(self.base.entries["first"].locations, overlay.entries["first"].locations)
+        self.assertNotIn("second", overlay.entries)
+
+
+class PoFileTemplateTestCase(TestCase):
+    def setUp(self):
+        self.base = PoFile()
+        self.base.add_entry("b").add_location("file.py", 1)
+        self.base.add_entry("d", context="context").add_location("file.py", 2)
+        self.base.add_entry("f", "fs").add_location("file.py", 3)
+        self.base.add_entry("h").add_location("other.py", 1)
+
+    def _fill(self, po_file):
+        po_file.add_header_field("Plural-Forms", "nplurals=3; plural=n;")
+        po_file.add_entry("a").add_translation("obsolete a")
+        po_file.add_entry("b").add_translation("bee")
+        po_file.add_entry("f", "fs").add_plural_translation(2, "effs")
+        po_file.add_entry("h", "hs").add_plural_translation(1, "hashes")
+        po_file.add_entry("z").add_translation("obsolete z")
+        po_file.add_entry("empty")
+
+    def test_same_as_overlay_dump(self):
+        for include_locations in (True, False):
+            template = PoFileTemplate(self.base, include_locations)
+            for prune_obsoletes in (True, False):
+                overlay = self.base.overlay()
+                self._fill(overlay)
+                output = io.StringIO()
+                template.dump(overlay, output, prune_obsoletes=prune_obsoletes)
+                self.assertEqual(
+                    overlay.dumps(include_locations=include_locations, prune_obsoletes=prune_obsoletes),
+                    output.getvalue())
+
+    def test_unchanged_overlay(self):
+        template = PoFileTemplate(self.base)
+        output = io.StringIO()
+        template.dump(self.base.overlay(), output)
+        self.assertEqual(self.base.dumps(), output.getvalue())
+
+
+class PluralFunctionTestCase(TestCase):
+    def test_plural_forms(self):
+        plural = get_plural_function('nplurals=3; plural=n%10==1 && n%100!=11 ? 0 : n != 0 ? 1 : 2;')
+        self.assertEqual([2, 0, 1, 1], [plural(n) for n in (0, 1, 2, 11)])
+
+    def test_default(self):
+        for plural_forms in (None, 'nplurals=2;', 'nplurals=2; plural=import os'):
+            plural = get_plural_function(plural_forms)
+            self.assertEqual([1, 0, 1], [plural(n) for n in (0, 1, 2)])
@@ -0,0 +1,65 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from unittest import TestCase
+from po_localization import pool
+from po_localization.pool import map_in_pool
+
+initialized = False
+
+
+class MapInPoolTestCase(TestCase):
+    def test_serial(self):
+        self.assertListEqual([1, 4, 9], map_in_pool(square, [1, 2, 3]))
+
+    def test_parallel(self):
+        self.assertListEqual([square(item) for item in range(50)], map_in_pool(square, range(50), jobs=4))
+
+    def test_initializer(self):
+        self.assertListEqual([True] * 10, map_in_pool(is_initialized, range(10), jobs=2, initializer=initialize))
+
+    def test_initializer_arguments(self):
+        self.assertListEqual(
+            [3] * 10, map_in_pool(get_initialized, range(10), jobs=2, initializer=initialize, initializer_arguments=(3,)))
+
+    def test_initializer_error(self):
+        self.assertRaises(ValueError, map_in_pool, square, [1, 2, 3], jobs=2, initializer=fail_initialize)
+
+    def test_error(self):
+        self.assertRaises(ValueError, map_in_pool, fail, [1, 2, 3], jobs=2)
+
+    def test_unavailable_pool(self):
+        original_create_pool = pool._create_pool
+        pool._create_pool = lambda processes, initializer, initializer_arguments: None
+        try:
+            self.assertListEqual([1, 4, 9], map_in_pool(square, [1, 2, 3], jobs=2))
+        finally:
+            pool._create_pool = original_create_pool
+
+
+def square(item):
+    return item * item
+
+
+def fail(item):
+    raise ValueError(item)
+
+
+def initialize(value=True):
+    global initialized
+    initialized = value
+
+
+def fail_initialize():
+    raise ValueError("initializer")
+
+
+def is_initialized(item):
+    return initialized is True
+
+
+def get_initialized(item):
+    return initialized
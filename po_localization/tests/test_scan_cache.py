@@ -0,0 +1,110 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from po_localization import scan_cache
+from po_localization.scan_cache import ScanCache, get_outermost_directories, walk_excluding
+
+
+class ScanCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for directory in ('a', 'a/b', 'c'):
+            os.mkdir(os.path.join(self.temp_dir, directory))
+        for filename in ('a/1.py', 'a/b/2.html', 'c/3.txt', 'c/4.po'):
+            self._create_file(filename)
+        self._age_directories()
+        self.listed_paths = []
+        self.list_directory = scan_cache.list_directory
+        scan_cache.list_directory = self._list_directory
+
+    def tearDown(self):
+        scan_cache.list_directory = self.list_directory
+        shutil.rmtree(self.temp_dir)
+
+    def _create_file(self, filename):
+        with open(os.path.join(self.temp_dir, filename), 'w'):
+            pass
+
+    def _age_directories(self):
+        for dirpath, dirnames, filenames in os.walk(self.temp_dir):
+            os.utime(dirpath, (1000000000, 1000000000))
+
+    def _list_directory(self, path):
+        self.listed_paths.append(path)
+        return self.list_directory(path)
+
+    def _walk(self, cache):
+        return sorted((dirpath, sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in cache.walk(
+            self.temp_dir))
+
+    def test_walk(self):
+        cache = ScanCache()
+        expected = sorted(
+            (dirpath, sorted(dirnames), sorted(filenames))
+            for dirpath, dirnames, filenames in os.walk(self.temp_dir))
+        self.assertListEqual(expected, self._walk(cache))
+        self.assertEqual(4, len(self.listed_paths))
+        self.assertListEqual(expected, self._walk(cache))
+        self.assertEqual(4, len(self.listed_paths))
+
+    def test_changed_directory(self):
+        cache = ScanCache()
+        self._walk(cache)
+        self._create_file('a/b/5.py')
+        os.utime(os.path.join(self.temp_dir, 'a/b'), (1000000001, 1000000001))
+        del self.listed_paths[:]
+        self.assertIn(os.path.join(self.temp_dir, 'a/b/5.py'), list(cache.iter_files([self.temp_dir])))
+        self.assertListEqual([os.path.join(self.temp_dir, 'a/b')], self.listed_paths)
+
+    def test_recent_directory(self):
+        cache = ScanCache()
+        os.utime(os.path.join(self.temp_dir, 'c'), None)
+        self._walk(cache)
+        del self.listed_paths[:]
+        self._walk(cache)
+        self.assertListEqual([os.path.join(self.temp_dir, 'c')], self.listed_paths)
+
+    def test_pruned_walk(self):
+        cache = ScanCache()
+        dirpaths = []
+        for dirpath, dirnames, filenames in cache.walk(self.temp_dir):
+            dirpaths.append(dirpath)
+            if 'a' in dirnames:
+                dirnames.remove('a')
+        self.assertListEqual([self.temp_dir, os.path.join(self.temp_dir, 'c')], dirpaths)
+
+    def test_iter_files(self):
+        cache = ScanCache()
+        file_paths = list(cache.iter_files(
+            [os.path.join(self.temp_dir, 'a'), self.temp_dir, self.temp_dir + '/'], ('.py', '.html')))
+        self.assertListEqual(
+            sorted([os.path.join(self.temp_dir, 'a/1.py'), os.path.join(self.temp_dir, 'a/b/2.html')]),
+            sorted(file_paths))
+
+    def test_excluded_patterns(self):
+        cache = ScanCache()
+        file_paths = list(cache.iter_files([self.temp_dir], excluded_patterns=('b/', '*.po')))
+        self.assertListEqual(
+            sorted([os.path.join(self.temp_dir, 'a/1.py'), os.path.join(self.temp_dir, 'c/3.txt')]),
+            sorted(file_paths))
+        # The excluded directory is never listed
+        self.assertNotIn(os.path.join(self.temp_dir, 'a/b'), self.listed_paths)
+
+    def test_excluded_relative_patterns(self):
+        file_paths = [
+            os.path.join(dirpath, filename)
+            for dirpath, dirnames, filenames in walk_excluding(os.walk, self.temp_dir, ('/a/b', 'c/*.txt'))
+            for filename in filenames]
+        self.assertListEqual(
+            sorted([os.path.join(self.temp_dir, 'a/1.py'), os.path.join(self.temp_dir, 'c/4.po')]),
+            sorted(file_paths))
+
+    def test_outermost_directories(self):
+        self.assertListEqual(['/a', '/b/'], get_outermost_directories(['/a', '/a/b', '/b/', '/b', '/ab/../a/c']))
@@ -0,0 +1,135 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+from unittest import TestCase
+from po_localization import shared_catalog as shared_catalog_module
+from po_localization.shared_catalog import (
+    SharedCatalog, get_default_cache_dir, load_catalog, open_catalog, write_catalog)
+
+
+class SharedCatalogTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'fr.catalog')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_lookup(self):
+        catalog = {
+            "Message to translate": "Message à traduire",
+            "Context\x04Message to translate": "Message à traduire dans un contexte",
+            ("Message to translate", 0): "Message à traduire",
+            ("Message to translate", 1): "Messages à traduire"}
+        catalog.update(("Message {}".format(index), "Traduction {}".format(index)) for index in range(1000))
+        write_catalog(self.filename, catalog, ())
+        shared_catalog = SharedCatalog(self.filename)
+        self.assertEqual(len(catalog), len(shared_catalog))
+        self.assertEqual("Messages à traduire", shared_catalog[("Message to translate", 1)])
+        self.assertEqual("Traduction 42", shared_catalog.get("Message 42"))
+        self.assertIn("Context\x04Message to translate", shared_catalog)
+        self.assertNotIn("Missing message", shared_catalog)
+        self.assertNotIn(("Message to translate", 2), shared_catalog)
+        self.assertIsNone(shared_catalog.get("Missing message"))
+        self.assertRaises(KeyError, shared_catalog.__getitem__, "Missing message")
+        self.assertDictEqual(catalog, dict(shared_catalog))
+
+    def test_empty(self):
+        write_catalog(self.filename, {}, ())
+        shared_catalog = SharedCatalog(self.filename)
+        self.assertEqual(0, len(shared_catalog))
+        self.assertNotIn("Missing message", shared_catalog)
+
+    def test_load(self):
+        created_catalogs = []
+
+        def create_catalog():
+            created_catalogs.append({"Message to translate": "Traduction {}".format(len(created_catalogs))})
+            return created_catalogs[-1]
+
+        catalog = load_catalog(self.filename, ('signature', 1), create_catalog)
+        self.assertEqual("Traduction 0", catalog["Message to translate"])
+        catalog = load_catalog(self.filename, ('signature', 1), create_catalog)
+        self.assertEqual("Traduction 0", catalog["Message to translate"])
+        self.assertEqual(1, len(created_catalogs))
+        catalog = load_catalog(self.filename, ('signature', 2), create_catalog)
+        self.assertEqual("Traduction 1", catalog["Message to translate"])
+        self.assertEqual(2, len(created_catalogs))
+
+    def test_corrupt_file(self):
+        with io.open(self.filename, 'wb') as catalog_file:
+            catalog_file.write(b'garbage')
+        catalog = load_catalog(self.filename, (), lambda: {"Message to translate": "Message à traduire"})
+        self.assertIsInstance(catalog, SharedCatalog)
+        self.assertEqual("Message à traduire", catalog["Message to translate"])
+
+    def test_unwritable_file(self):
+        os.makedirs(self.filename)
+        catalog = load_catalog(self.filename, (), lambda: {"Message to translate": "Message à traduire"})
+        self.assertDictEqual({"Message to translate": "Message à traduire"}, catalog)
+
+    def test_truncated_file(self):
+        catalog = dict(("Message {}".format(index), "Traduction {}".format(index)) for index in range(100))
+        write_catalog(self.filename, catalog, ())
+        with io.open(self.filename, 'rb') as catalog_file:
+            data = catalog_file.read()
+        for size in (10, len(data) // 2, len(data) - 1):
+            with io.open(self.filename, 'wb') as catalog_file:
+                catalog_file.write(data[:size])
+            self.assertRaises(ValueError, SharedCatalog, self.filename)
+            self.assertIsNone(open_catalog(self.filename, ()))
+
+    def test_corrupt_span(self):
+        write_catalog(self.filename, {"Message to translate": "Message à traduire"}, ())
+        catalog = SharedCatalog(self.filename)
+        index = catalog._find("Message to translate")
+        with io.open(self.filename, 'rb') as catalog_file:
+            data = bytearray(catalog_file.read())
+        # Points the value of the only entry past the end of the file
+        bucket_offset = data.index(struct.pack(str('<II'), *index))
+        data[bucket_offset:bucket_offset + 4] = struct.pack(str('<I'), len(data))
+        with io.open(self.filename, 'wb') as catalog_file:
+            catalog_file.write(bytes(data))
+        self.assertRaises(ValueError, SharedCatalog(self.filename).__getitem__, "Message to translate")
+
+
+class DefaultCacheDirTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.previous_gettempdir = shared_catalog_module.tempfile.gettempdir
+        shared_catalog_module.tempfile.gettempdir = lambda: self.temp_dir
+
+    def tearDown(self):
+        shared_catalog_module.tempfile.gettempdir = self.previous_gettempdir
+        shutil.rmtree(self.temp_dir)
+
+    def test_private(self):
+        cache_dir = get_default_cache_dir()
+        self.assertEqual(self.temp_dir, os.path.dirname(cache_dir))
+        self.assertTrue(os.path.isdir(cache_dir))
+        if hasattr(os, 'getuid'):
+            self.assertEqual(0, os.stat(cache_dir).st_mode & 0o077)
+        self.assertEqual(cache_dir, get_default_cache_dir())
+
+    def test_accessible_to_others(self):
+        if not hasattr(os, 'getuid'):
+            return
+        cache_dir = get_default_cache_dir()
+        os.chmod(cache_dir, 0o777)
+        self.assertIsNone(get_default_cache_dir())
+
+    def test_symbolic_link(self):
+        if not hasattr(os, 'getuid'):
+            return
+        target_dir = os.path.join(self.temp_dir, 'target')
+        os.mkdir(target_dir, 0o700)
+        os.symlink(target_dir, os.path.join(self.temp_dir, 'po_localization-{}'.format(os.getuid())))
+        self.assertIsNone(get_default_cache_dir())
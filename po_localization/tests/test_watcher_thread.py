@@ -0,0 +1,49 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import threading
+from unittest import TestCase
+from po_localization.watcher_thread import WatcherThread
+
+
+class WatcherThreadTestCase(TestCase):
+    def setUp(self):
+        self.checked = threading.Event()
+        self.check_calls = 0
+
+    def _check(self):
+        self.check_calls += 1
+        self.checked.set()
+        if self.check_calls == 1:
+            raise ValueError("Broken translation file")
+
+    def test_check(self):
+        logger = logging.getLogger('po_localization.watcher_thread')
+        logger.disabled = True
+        watcher_thread = WatcherThread(self._check, interval=0.001)
+        try:
+            watcher_thread.start()
+            self.assertTrue(self.checked.wait(5))
+            self.checked.clear()
+            # The thread survives exceptions
+            self.assertTrue(self.checked.wait(5))
+            self.assertTrue(watcher_thread.is_alive())
+        finally:
+            watcher_thread.stop()
+            logger.disabled = False
+        self.assertFalse(watcher_thread.is_alive())
+        check_calls = self.check_calls
+        self.checked.clear()
+        self.assertFalse(self.checked.wait(0.05))
+        self.assertEqual(check_calls, self.check_calls)
+
+    def test_stop_before_check(self):
+        watcher_thread = WatcherThread(self._check, interval=60)
+        watcher_thread.start()
+        watcher_thread.stop(5)
+        self.assertFalse(watcher_thread.is_alive())
+        self.assertEqual(0, self.check_calls)
@@ -4,33 +4,244 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import hashlib
 import os
+import threading
 import django.utils.translation.trans_real
-from . import parser
+from django.conf import settings
+from . import catalog_cache, parser, shared_catalog
+from .catalog_merger import CatalogMerger
+from .deferred_catalog import DeferredCatalog
+from .lazy_catalog import LazyCatalog
+from .po_file import get_plural_function
+from .po_translation import PoTranslation
+from .pool import map_in_pool
+
+CATALOG_TYPES = ('dict', 'lazy', 'shared')
 
 
 class TranslationsLoader(object):
-    def __init__(self, locale_paths=(), locales=()):
+    def __init__(
+            self, locale_paths=(), locales=(), catalog_type='dict', use_cache=False, cache_dir=None, jobs=1):
         self.locale_paths = locale_paths
         self.locales = locales
+        self.catalog_type = catalog_type
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.on_demand = False
+        self.loaded_locales = set()
+        self._deferred_locales = set()
+        self._catalog_mergers = {}
+        self._prefetched_file_catalogs = {}
+        # locale -> (filename, signature, shared catalog) opened while prefetching
+        self._prefetched_shared_catalogs = {}
+        # Serializes loading and deferring, which read and update the loaded and deferred locales
+        self._lock = threading.RLock()
         super(TranslationsLoader, self).__init__()
 
-    def execute(self):
-        for locale in self.locales:
-            language = django.utils.translation.trans_real.to_language(locale)
-            # XXX: this will trigger useless loading of translations from django code
-            catalog = django.utils.translation.trans_real.translation(language)._catalog
-            catalog.clear()
-            for file_path in self._get_translation_files(locale):
-                catalog.update(parser.parse_po_filename(file_path))
+    def execute(self, locales=None):
+        """
+        Loads the catalogs of the given locales, or of all locales if locales is None.
+        """
+        if self.catalog_type not in CATALOG_TYPES:
+            raise ValueError("Unknown catalog type: {}".format(self.catalog_type))
+        locales = self.locales if locales is None else locales
+        with self._lock:
+            if self.jobs > 1:
+                self._prefetch_file_catalogs(self.loaded_locales.union(locales) if self.on_demand else self.locales)
+            for locale in locales:
+                translation = self._get_translation(locale)
+                # The new catalog is built aside and swapped in, requests never see a partially loaded catalog
+                catalog = self._load_catalog(locale, translation._catalog)
+                plural = self._get_plural_function(locale)
+                translation._catalog = catalog
+                translation.plural = plural
+                self.loaded_locales.add(locale)
+                self._deferred_locales.discard(locale)
 
-    def list_files(self):
-        for locale in self.locales:
+    def defer(self, locale, load):
+        """
+        Replaces the catalog of a locale which is neither loaded nor deferred yet,
+        by a catalog which calls load() the first time it is used. load() should end up calling execute.
+        """
+        # Under the lock, so that a locale loaded concurrently is never replaced by a deferred catalog
+        with self._lock:
+            if locale not in self.loaded_locales and locale not in self._deferred_locales:
+                translation = self._get_translation(locale)
+                translation._catalog = DeferredCatalog(translation, load)
+                self._deferred_locales.add(locale)
+
+    def list_files(self, locales=None):
+        for locale in self.locales if locales is None else locales:
             for file_path in self._get_translation_files(locale):
                 yield file_path
 
+    def list_directories(self, locales=None):
+        """
+        Yields the translation directory of each locale in each locale path,
+        or its nearest existing parent inside the locale path so that its creation is noticed.
+        """
+        for locale in self.locales if locales is None else locales:
+            for locale_path in self.locale_paths:
+                for directory in (
+                        os.path.join(locale_path, locale, 'LC_MESSAGES'), os.path.join(locale_path, locale),
+                        locale_path):
+                    if os.path.isdir(directory):
+                        yield directory
+                        break
+
+    def get_locale_operators(self):
+        return [LocaleOperator(self, locale) for locale in self.locales]
+
+    @staticmethod
+    def _get_translation(locale):
+        """
+        Returns the PoTranslation of the locale, installing it in place of Django's translation on first use.
+        """
+        trans_real = django.utils.translation.trans_real
+        language = trans_real.to_language(locale)
+        translation = trans_real._translations.get(language)
+        if not isinstance(translation, PoTranslation):
+            previous_translation = translation
+            translation = PoTranslation(language)
+            default_language = trans_real.to_language(settings.LANGUAGE_CODE)
+            if language != default_language:
+                # Like Django, look up missing translations in the default language
+                translation.add_fallback(
+                    TranslationsLoader._get_translation(trans_real.to_locale(default_language)))
+            trans_real._translations[language] = translation
+            if previous_translation is not None and trans_real._default is previous_translation:
+                trans_real._default = translation
+        return translation
+
     def _get_translation_files(self, locale):
         for locale_path in self.locale_paths:
             translation_path = os.path.join(locale_path, locale, 'LC_MESSAGES/django.po')
             if os.path.isfile(translation_path):
                 yield translation_path
+
+    def _get_plural_function(self, locale):
+        # Like gettext, the first file defining the plural forms wins
+        for file_path in self._get_translation_files(locale):
+            plural_forms = dict(parser.read_header_fields(file_path)).get('Plural-Forms')
+            if plural_forms is not None:
+                return get_plural_function(plural_forms)
+        return get_plural_function(None)
+
+    def _prefetch_file_catalogs(self, locales):
+        """
+        Parses in a pool of processes all the files which are needed to build the catalogs, largest first.
+        Files of all locales are parsed at once, so that reloading the locales one by one still uses the pool.
+        """
+        file_paths = []
+        for locale in locales:
+            locale_file_paths = list(self._get_translation_files(locale))
+            if self.catalog_type == 'dict':
+                file_paths.extend(self._get_catalog_merger(locale).get_stale_files(locale_file_paths))
+            elif self.catalog_type == 'shared':
+                catalog_filename = self._get_shared_catalog_filename(locale, locale_file_paths)
+                catalog_signature = self._get_shared_catalog_signature(locale_file_paths)
+                catalog = None if catalog_filename is None else shared_catalog.open_catalog(
+                    catalog_filename, catalog_signature)
+                if catalog is None:
+                    file_paths.extend(locale_file_paths)
+                else:
+                    # Kept, so that loading the locale does not open the catalog again
+                    self._prefetched_shared_catalogs[locale] = (catalog_filename, catalog_signature, catalog)
+        signatures = dict((file_path, catalog_cache.get_signature(file_path)) for file_path in file_paths)
+        file_paths = [
+            file_path for file_path in file_paths
+            if self._prefetched_file_catalogs.get(file_path, (None, None))[0] != signatures[file_path]]
+        file_paths.sort(key=os.path.getsize, reverse=True)
+        catalogs = map_in_pool(
+            load_file_catalog, [(file_path, self.use_cache, self.cache_dir) for file_path in file_paths], self.jobs)
+        for file_path, catalog in zip(file_paths, catalogs):
+            self._prefetched_file_catalogs[file_path] = (signatures[file_path], catalog)
+
+    def _load_catalog(self, locale, catalog):
+        """
+        Returns a new catalog for the locale, catalog is the current one and is never modified.
+        """
+        file_paths = list(self._get_translation_files(locale))
+        if self.catalog_type == 'shared':
+            catalog_filename = self._get_shared_catalog_filename(locale, file_paths)
+            if catalog_filename is None:
+                # Without a safe directory to share it, the catalog is only used by this process
+                return self._fill_catalog({}, file_paths)
+            catalog_signature = self._get_shared_catalog_signature(file_paths)
+            prefetched_filename, prefetched_signature, prefetched_catalog = self._prefetched_shared_catalogs.pop(
+                locale, (None, None, None))
+            if prefetched_filename == catalog_filename and prefetched_signature == catalog_signature:
+                return prefetched_catalog
+            return shared_catalog.load_catalog(
+                catalog_filename, catalog_signature, lambda: self._fill_catalog({}, file_paths))
+        if self.catalog_type == 'lazy':
+            catalog = LazyCatalog()
+            for file_path in file_paths:
+                catalog.add_po_filename(file_path)
+            return catalog
+        return self._get_catalog_merger(locale).merge(catalog, file_paths, self._load_file_catalog)
+
+    def _get_catalog_merger(self, locale):
+        catalog_merger = self._catalog_mergers.get(locale)
+        if catalog_merger is None:
+            catalog_merger = self._catalog_mergers[locale] = CatalogMerger()
+        return catalog_merger
+
+    def _load_file_catalog(self, file_path):
+        signature, catalog = self._prefetched_file_catalogs.pop(file_path, (None, None))
+        if signature is not None and signature == catalog_cache.get_signature(file_path):
+            return catalog
+        return load_file_catalog((file_path, self.use_cache, self.cache_dir))
+
+    def _fill_catalog(self, catalog, file_paths):
+        # Files are merged in locale_paths order, so that later paths override earlier ones
+        for file_path in file_paths:
+            catalog.update(self._load_file_catalog(file_path))
+        return catalog
+
+    @staticmethod
+    def _get_shared_catalog_signature(file_paths):
+        return tuple(catalog_cache.get_signature(file_path) for file_path in file_paths)
+
+    def _get_shared_catalog_filename(self, locale, file_paths):
+        """
+        Returns None if no cache directory is configured and the default one cannot be used safely.
+        """
+        cache_dir = shared_catalog.get_default_cache_dir() if self.cache_dir is None else self.cache_dir
+        if cache_dir is None:
+            return None
+        paths_hash = hashlib.sha1('\n'.join(os.path.abspath(path) for path in file_paths).encode('utf-8')).hexdigest()
+        return os.path.join(cache_dir, '{}-{}.catalog'.format(locale, paths_hash))
+
+
+class LocaleOperator(object):
+    """
+    FileWatcher operator which only watches and loads the translations of one locale of a TranslationsLoader.
+    """
+
+    def __init__(self, translations_loader, locale):
+        self.translations_loader = translations_loader
+        self.locale = locale
+
+    def is_loaded(self):
+        return self.locale in self.translations_loader.loaded_locales
+
+    def execute(self):
+        self.translations_loader.execute([self.locale])
+
+    def list_files(self):
+        return self.translations_loader.list_files([self.locale])
+
+    def list_directories(self):
+        return self.translations_loader.list_directories([self.locale])
+
+
+def load_file_catalog(arguments):
+    file_path, use_cache, cache_dir = arguments
+    if use_cache:
+        return catalog_cache.load_catalog(file_path, cache_dir)
+    catalog = {}
+    parser.fill_catalog_from_po_filename(file_path, catalog)
+    return catalog
@@ -6,9 +6,14 @@ from __future__ import unicode_literals
 
 import io
 import os
-from . import python_extractor, template_extractor
+import stat
+from . import python_extractor, shared_catalog, template_extractor
+from .base_catalog import BaseCatalog
+from .extraction_cache import ExtractionCache, extract_records, get_cache_filename, get_signature
 from .parser import Parser
-from .po_file import PoFile
+from .po_file import PoFileTemplate
+from .pool import map_in_pool
+from .scan_cache import ScanCache, is_in_directory, walk_excluding
 
 extractors = {
     '.html': template_extractor.extract_messages,
@@ -16,58 +21,250 @@ extractors = {
     '.py': python_extractor.extract_messages
 }
 """:type extractors: dict[str, (str, str, str) -> None]"""
+EXTRACTORS_VERSION = (python_extractor.EXTRACTOR_VERSION, template_extractor.EXTRACTOR_VERSION)
+# Number of files extracted by each task of parallel extractions
+EXTRACTION_BATCH_SIZE = 16
+# (base PoFile, PoFileTemplate) of the tasks run by the processes of the update pool
+shared_update_arguments = None
 
 
 class TranslationsUpdater(object):
-    def __init__(self, root_paths=(), locales=(), include_locations=True, prune_obsoletes=False):
+    def __init__(
+            self, root_paths=(), locales=(), include_locations=True, prune_obsoletes=False, excluded_patterns=(),
+            use_cache=False, cache_dir=None, jobs=1):
         super(TranslationsUpdater, self).__init__()
         self.root_paths = root_paths
         self.locales = locales
         self.include_locations = include_locations
         self.prune_obsoletes = prune_obsoletes
+        self.excluded_patterns = excluded_patterns
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self._extraction_caches = {}
+        # Kept between executions, so that only the changed files are extracted again
+        self._base_catalogs = {}
+        # Shared by the file watcher and the extraction, so that unchanged directories are not listed again
+        self.scan_cache = ScanCache()
 
-    def execute(self):
+    # Executed by FileWatcher with the changed files, so that only the roots containing them are updated
+    accepts_change_set = True
+
+    def execute(self, change_set=None):
+        """
+        Returns the number of translation files which were written.
+        """
+        update_tasks = []
         for root_path in self.root_paths:
-            update_translations(
+            if change_set is not None and not any(
+                    is_in_directory(path, root_path) for paths in change_set for path in paths):
+                continue
+            update_tasks.extend(get_update_tasks(
                 root_path=root_path,
                 locales=self.locales,
                 include_locations=self.include_locations,
-                prune_obsoletes=self.prune_obsoletes)
+                prune_obsoletes=self.prune_obsoletes,
+                excluded_patterns=self.excluded_patterns,
+                scan_cache=self.scan_cache,
+                extraction_cache=self._get_extraction_cache(root_path) if self.use_cache else None,
+                jobs=self.jobs,
+                base_catalog=self._base_catalogs.setdefault(root_path, BaseCatalog())))
+        # The locales of all roots are updated at once, so that all jobs are busy
+        return run_update_tasks(update_tasks, self.jobs)
 
     def list_files(self):
-        for root_path in self.root_paths:
-            for dirpath, dirnames, filenames in os.walk(root_path):
-                for filename in filenames:
-                    extension = os.path.splitext(filename)[1]
-                    if extension in extractors:
-                        yield os.path.join(dirpath, filename)
+        return self.scan_cache.iter_files(self.root_paths, extractors, self.excluded_patterns)
+
+    def list_directories(self):
+        return self.root_paths
+
+    def _get_extraction_cache(self, root_path):
+        """
+        Returns None if no cache directory is configured and the default one cannot be used safely.
+        """
+        # Caches are kept in memory, so that their file is only read once
+        cache_dir = shared_catalog.get_default_cache_dir() if self.cache_dir is None else self.cache_dir
+        if cache_dir is None:
+            return None
+        cache_filename = get_cache_filename(root_path, cache_dir)
+        extraction_cache = self._extraction_caches.get(cache_filename)
+        if extraction_cache is None:
+            extraction_cache = self._extraction_caches[cache_filename] = ExtractionCache(
+                cache_filename, EXTRACTORS_VERSION)
+        return extraction_cache
 
 
 def update_translations(
         root_path, domain='django', locales=(), locales_path='locale',
-        update_all=True, include_locations=True, prune_obsoletes=False):
+        update_all=True, include_locations=True, prune_obsoletes=False, excluded_patterns=(), scan_cache=None,
+        extraction_cache=None, jobs=1, base_catalog=None):
+    """
+    Returns the number of translation files which were written.
+    """
+    return run_update_tasks(get_update_tasks(
+        root_path, domain, locales, locales_path, update_all, include_locations, prune_obsoletes, excluded_patterns,
+        scan_cache, extraction_cache, jobs, base_catalog), jobs)
+
+
+def get_update_tasks(
+        root_path, domain='django', locales=(), locales_path='locale',
+        update_all=True, include_locations=True, prune_obsoletes=False, excluded_patterns=(), scan_cache=None,
+        extraction_cache=None, jobs=1, base_catalog=None):
+    """
+    Extracts the messages of the root and returns the arguments of update_locale_translations for each locale.
+    """
     locales_path = os.path.join(root_path, locales_path)
-    base_po_file = create_base_po_file(root_path)
+    base_po_file = create_base_po_file(
+        root_path, excluded_patterns, scan_cache, extraction_cache, jobs, base_catalog)
     create_locales_paths(locales_path, locales)
+    # Sorting and rendering the locale-independent lines of the entries is done once for all locales
+    template = PoFileTemplate(base_po_file, include_locations)
+    update_tasks = []
     if os.path.isdir(locales_path):
         for locale in os.listdir(locales_path):
             locale_path = os.path.join(locales_path, locale)
             if os.path.isdir(locale_path) and (update_all or locale in locales):
-                update_locale_translations(base_po_file, locale_path, domain, include_locations, prune_obsoletes)
+                update_tasks.append((base_po_file, locale_path, domain, include_locations, prune_obsoletes, template))
+    return update_tasks
+
+
+def run_update_tasks(update_tasks, jobs=1):
+    """
+    Calls update_locale_translations for each task and returns the number of translation files which were written.
+    Every task is run even if some fail, and the error of the first failed task is raised afterwards.
+    With more than one job, the tasks are run in a pool of processes.
+    """
+    if jobs <= 1:
+        results = [run_update_task(update_task) for update_task in update_tasks]
+    else:
+        results = run_pool_update_tasks(update_tasks, jobs)
+    written_files_count = 0
+    for is_written, error in results:
+        if error is not None:
+            raise error
+        if is_written:
+            written_files_count += 1
+    return written_files_count
+
+
+def run_pool_update_tasks(update_tasks, jobs):
+    # The base PoFiles and templates are large and the same for all the locales of a root,
+    # they are sent once to each process instead of once per task. Tasks only refer to them by index.
+    global shared_update_arguments
+    shared_arguments = []
+    shared_indices = {}
+    pool_tasks = []
+    for po_file, locale_path, domain, include_locations, prune_obsoletes, template in update_tasks:
+        key = (id(po_file), id(template))
+        if key not in shared_indices:
+            shared_indices[key] = len(shared_arguments)
+            shared_arguments.append((po_file, template))
+        pool_tasks.append((shared_indices[key], locale_path, domain, include_locations, prune_obsoletes))
+    # Also set in the current process, for when the tasks cannot be run in a pool
+    shared_update_arguments = shared_arguments
+    try:
+        return map_in_pool(
+            run_pool_update_task, pool_tasks, jobs, initialize_update_process, (shared_arguments,))
+    finally:
+        shared_update_arguments = None
+
+
+def initialize_update_process(shared_arguments):
+    global shared_update_arguments
+    shared_update_arguments = shared_arguments
+
+
+def run_pool_update_task(pool_task):
+    shared_index, locale_path, domain, include_locations, prune_obsoletes = pool_task
+    po_file, template = shared_update_arguments[shared_index]
+    return run_update_task((po_file, locale_path, domain, include_locations, prune_obsoletes, template))
 
 
-def create_base_po_file(root_path):
-    base_po_file = PoFile()
+def run_update_task(update_task):
+    # Errors are returned instead of raised, so that they do not interrupt the other tasks
+    try:
+        return update_locale_translations(*update_task), None
+    except Exception as e:
+        return False, e
+
+
+def create_base_po_file(
+        root_path, excluded_patterns=(), scan_cache=None, extraction_cache=None, jobs=1, base_catalog=None):
+    """
+    With more than one job, files are extracted in a pool of processes,
+    but their messages are still added in walk order so that the result is the same.
+    If base_catalog is given, only the files which changed since its last update are extracted.
+    """
+    if base_catalog is None:
+        base_catalog = BaseCatalog()
+    files = []
+    stale_sources = []
+    for extension, full_filename, printable_filename in iter_sources(root_path, excluded_patterns, scan_cache):
+        signature = get_signature(full_filename, printable_filename)
+        if base_catalog.is_stale(full_filename, signature):
+            stale_sources.append((extension, full_filename, printable_filename))
+        elif extraction_cache is not None:
+            extraction_cache.keep(full_filename)
+        files.append((full_filename, signature))
+    extracted_records = extract_sources_records(stale_sources, extraction_cache, jobs)
+    base_catalog.update([
+        (full_filename, signature, extracted_records.get(full_filename)) for full_filename, signature in files])
+    if extraction_cache is not None:
+        extraction_cache.save()
+    return base_catalog.po_file
+
+
+def extract_sources_records(sources, extraction_cache=None, jobs=1):
+    """
+    Returns a dict of the records extracted from each of the (extension, filename, printable_filename) sources.
+    """
+    extracted_records = {}
+    if jobs > 1:
+        batches = []
+        for extension, full_filename, printable_filename in sources:
+            if extraction_cache is None or not extraction_cache.is_cached(full_filename, printable_filename):
+                if not batches or len(batches[-1]) == EXTRACTION_BATCH_SIZE:
+                    batches.append([])
+                batches[-1].append((extension, full_filename, printable_filename))
+        for batch, batch_records in zip(
+                batches, map_in_pool(extract_batch_records, batches, jobs, initialize_extraction_process)):
+            for (extension, full_filename, printable_filename), records in zip(batch, batch_records):
+                extracted_records[full_filename] = records
+    for extension, full_filename, printable_filename in sources:
+        extractor = extractors[extension]
+        if extraction_cache is not None:
+            extracted_records[full_filename] = extraction_cache.get_records(
+                extractor, full_filename, printable_filename, extracted_records.get(full_filename))
+        elif full_filename not in extracted_records:
+            extracted_records[full_filename] = extract_records(extractor, full_filename, printable_filename)
+    return extracted_records
+
+
+def iter_sources(root_path, excluded_patterns=(), scan_cache=None):
+    """
+    Yields (extension, filename, printable_filename) for each file of the root which has an extractor.
+    """
     root_path_length = len(root_path) + (0 if root_path.endswith('/') else 1)
-    for dirpath, dirnames, filenames in os.walk(root_path):
+    walk = os.walk if scan_cache is None else scan_cache.walk
+    for dirpath, dirnames, filenames in walk_excluding(walk, root_path, excluded_patterns):
         for filename in filenames:
             extension = os.path.splitext(filename)[1]
-            extractor = extractors.get(extension, None)
-            if extractor is not None:
+            if extension in extractors:
                 full_filename = os.path.join(dirpath, filename)
-                printable_filename = full_filename[root_path_length:]
-                extractor(full_filename, base_po_file, printable_filename=printable_filename)
-    return base_po_file
+                yield extension, full_filename, full_filename[root_path_length:]
+
+
+def initialize_extraction_process():
+    # Template extraction needs the applications to be loaded, which is not inherited by spawned processes
+    import django
+    if hasattr(django, 'setup'):
+        django.setup()
+
+
+def extract_batch_records(batch):
+    return [
+        extract_records(extractors[extension], full_filename, printable_filename)
+        for extension, full_filename, printable_filename in batch]
 
 
 def create_locales_paths(locales_path, locales):
@@ -78,19 +275,69 @@ def create_locales_paths(locales_path, locales):
 
 
 def update_locale_translations(
-        po_file, locale_path, domain='django', include_locations=True, prune_obsoletes=False):
-    po_file = po_file.clone()
+        po_file, locale_path, domain='django', include_locations=True, prune_obsoletes=False, template=None):
+    """
+    Returns whether the translation file was written.
+    template, if given, is a PoFileTemplate of po_file with the same include_locations.
+    """
+    base_po_file = po_file
+    # Only the entries modified by the translation file are copied
+    po_file = po_file.overlay()
     translation_filename = os.path.join(locale_path, 'LC_MESSAGES/{}.po'.format(domain))
     if os.path.exists(translation_filename):
         Parser(po_file).parse_po_filename(translation_filename)
     if not os.path.exists(os.path.dirname(translation_filename)):
         os.makedirs(os.path.dirname(translation_filename))
     # We do this dance to avoid overwriting the locale file with a broken one
-    # if the dump function ever fails. A real atomic write may be better but
-    # requires fiddling with file attributes and alters the inode (which is used
-    # by osx aliases).
+    # if the dump function ever fails.
     memory_file = io.StringIO()
-    po_file.dump(memory_file, include_locations=include_locations, prune_obsoletes=prune_obsoletes)
-    memory_file.seek(0)
-    with io.open(translation_filename, 'w', encoding='utf-8') as locale_file:
-        locale_file.write(memory_file.read())
+    if template is not None and template.po_file is base_po_file:
+        template.dump(po_file, memory_file, prune_obsoletes=prune_obsoletes)
+    else:
+        po_file.dump(memory_file, include_locations=include_locations, prune_obsoletes=prune_obsoletes)
+    content = memory_file.getvalue()
+    # Unchanged files are not written, so that their modification time does not trigger a reload
+    if has_content(translation_filename, content):
+        return False
+    write_translation_file(translation_filename, content)
+    return True
+
+
+def write_translation_file(filename, content):
+    """
+    Replaces the file atomically, keeping its permissions.
+    Truncating it in place would crash the processes which memory-mapped it with the 'lazy' catalog type.
+    This alters the inode of the file, which is used by osx aliases.
+    """
+    temp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+    try:
+        with io.open(temp_filename, 'w', encoding='utf-8') as locale_file:
+            locale_file.write(content)
+        try:
+            os.chmod(temp_filename, stat.S_IMODE(os.stat(filename).st_mode))
+        except OSError:
+            pass
+        getattr(os, 'replace', os.rename)(temp_filename, filename)
+    except BaseException:
+        try:
+            os.unlink(temp_filename)
+        except OSError:
+            pass
+        raise
+
+
+def has_content(filename, content):
+    """
+    Returns whether the file contains exactly what writing content to it in text mode would produce.
+    """
+    data = content.encode('utf-8')
+    if os.linesep != '\n':
+        data = data.replace(b'\n', os.linesep.encode('ascii'))
+    try:
+        # Comparing sizes first avoids reading most of the modified files
+        if os.path.getsize(filename) != len(data):
+            return False
+        with io.open(filename, 'rb') as existing_file:
+            return existing_file.read() == data
+    except (IOError, OSError):
+        return False
@@ -0,0 +1,61 @@
+# coding=utf-8
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WatcherThread(object):
+    """
+    Calls check() every interval seconds in a daemon thread, until stop() is called or the interpreter exits.
+    Exceptions raised by check() are logged and do not stop the thread.
+    """
+
+    def __init__(self, check, interval=1.0):
+        self.check = check
+        self.interval = interval
+        self._stop_event = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            # Each thread has its own event, so that a stopping thread is never restarted
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop_event,), name='po_localization watcher')
+            self._thread.daemon = True
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=None):
+        """
+        Stops the thread and waits for the end of the current check.
+        """
+        thread = self._thread
+        if thread is not None:
+            self._thread = None
+            self._stop_event.set()
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+            unregister = getattr(atexit, 'unregister', None)
+            if unregister is not None:
+                unregister(self.stop)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, stop_event):
+        while True:
+            stop_event.wait(self.interval)
+            if stop_event.is_set():
+                break
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Failed to check translation files")